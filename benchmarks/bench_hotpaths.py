@@ -0,0 +1,218 @@
+"""
+Hot-path benchmark suite: load, query and render on synthetic datasets.
+
+For every scale (multiples of the bundled dataset's row count) it generates a
+synthetic CSV and measures
+  loadData.parse      - loader.loadData with no binary snapshot (fast CSV parse)
+  parseDataset.rows   - the reference DictReader/cleanRow parser, for comparison
+  loadData.snapshot   - loader.loadData from a fresh snapshot
+  processAnalysis     - random region/year/operation queries
+  processCountryTrend - random country/year-range queries
+  plotDashboard       - region bar and country line charts drawn with the Agg
+                        backend and rasterized to PNG in memory (Agg's show()
+                        does not draw, so the render goes through saveDashboard)
+reporting latency percentiles, throughput and tracemalloc peak memory.
+
+The report is JSON. With --baseline it is compared against a stored report and
+the exit status is 1 when any median latency or peak memory regresses by more
+than --tolerance.
+
+    python benchmarks/bench_hotpaths.py --scales 1 100 --output report.json
+    python benchmarks/bench_hotpaths.py --scales 1 100 --save-baseline
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import time
+import tracemalloc
+import warnings
+
+import matplotlib
+matplotlib.use("Agg")
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import numpy as np
+
+import loader
+import processor
+import snapshot
+import visualizer
+from synth import generateCSV
+
+DATA_DIR = os.path.join(BENCH_DIR, ".data")
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+OPERATIONS = ["average", "sum", "max", "min"]
+
+# Charts with more bars than this are skipped rather than left to run for hours.
+RENDER_LABEL_LIMIT = 5000
+
+# --- Measurement Helpers ---
+
+def percentile(sortedValues, q):
+    if not sortedValues:
+        return None
+    k = (len(sortedValues) - 1) * q
+    lo, hi = int(k), min(int(k) + 1, len(sortedValues) - 1)
+    return sortedValues[lo] + (sortedValues[hi] - sortedValues[lo]) * (k - lo)
+
+def measure(fn, jobs, setup=None):
+    """Times fn(job) for each job, then reruns the first job under tracemalloc for peak memory."""
+    latencies = []
+    for job in jobs:
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn(job)
+        latencies.append(time.perf_counter() - start)
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    fn(jobs[0])
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    latencies.sort()
+    total = sum(latencies)
+    return {
+            "runs": len(latencies),
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p95_ms": percentile(latencies, 0.95) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+            "mean_ms": statistics.mean(latencies) * 1000,
+            "throughput_per_s": len(latencies) / total if total else None,
+            "peak_mem_bytes": peak
+            }
+
+def dropSnapshot(path):
+    shutil.rmtree(snapshot.snapshotPaths(path)["dir"], ignore_errors=True)
+
+def renderToMemory(result):
+    visualizer.saveDashboard(result, io.BytesIO())
+
+# --- Benchmarks ---
+
+def benchScale(scale, queries, renders, loadRuns, seed):
+    path = os.path.join(DATA_DIR, f"gdp_x{scale:g}.csv")
+    if not os.path.exists(path):
+        print(f"Generating {path} ...")
+        generateCSV(path, scale, seed)
+
+    rng = random.Random(seed)
+    results = {"rows": None, "file_bytes": os.path.getsize(path)}
+
+    loadJobs = [path] * loadRuns
+    results["loadData.parse"] = measure(loader.loadData, loadJobs, setup=lambda: dropSnapshot(path))
+    results["parseDataset.rows"] = measure(loader.parseDataset, loadJobs)
+    loader.loadData(path)  # leave a fresh snapshot behind
+    results["loadData.snapshot"] = measure(loader.loadData, loadJobs)
+
+    data = loader.loadDataset(path)
+    results["rows"] = len(data)
+    regions = data.index.regionNames
+    years = data.years.tolist()
+    countries = data.countries.tolist()
+
+    analysisJobs = [{"region": rng.choice(regions), "year": rng.choice(years), "operation": rng.choice(OPERATIONS)}
+                    for _ in range(queries)]
+    results["processAnalysis"] = measure(lambda c: processor.processAnalysis(data, c), analysisJobs)
+
+    def trendJob():
+        start = rng.choice(years)
+        return (rng.choice(countries), start, rng.randint(start, years[-1]))
+    trendJobs = [trendJob() for _ in range(queries)]
+    results["processCountryTrend"] = measure(lambda j: processor.processCountryTrend(data, *j), trendJobs)
+
+    renderJobs = []
+    for i in range(renders):
+        if i % 2 == 0:
+            result = processor.processAnalysis(data, analysisJobs[i % len(analysisJobs)])
+            result["graph"] = "bar"
+        else:
+            result = processor.processCountryTrend(data, countries[i % len(countries)], years[0], years[-1])
+        if result and 0 < len(result["plotData"]["labels"]) <= RENDER_LABEL_LIMIT:
+            renderJobs.append(result)
+    if renderJobs:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            results["plotDashboard"] = measure(renderToMemory, renderJobs)
+    else:
+        results["plotDashboard"] = {"skipped": f"every chart exceeded {RENDER_LABEL_LIMIT} labels"}
+
+    return results
+
+# --- Baseline Comparison ---
+
+def compare(report, baseline, tolerance):
+    """Returns a list of human-readable regressions against the baseline report."""
+    regressions = []
+    for scaleKey, benches in report["scales"].items():
+        baseBenches = baseline.get("scales", {}).get(scaleKey, {})
+        for name, stats in benches.items():
+            base = baseBenches.get(name)
+            if not isinstance(stats, dict) or not isinstance(base, dict):
+                continue
+            for metric in ("p50_ms", "peak_mem_bytes"):
+                if metric in stats and base.get(metric):
+                    ratio = stats[metric] / base[metric]
+                    stats.setdefault("vs_baseline", {})[metric] = ratio
+                    if ratio > 1 + tolerance:
+                        regressions.append(f"{scaleKey} {name} {metric}: {base[metric]:.3f} -> {stats[metric]:.3f} (x{ratio:.2f})")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark load, query and render hot paths.")
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 100],
+                        help="Dataset multiples to run (the full suite is 1 100 10000)")
+    parser.add_argument("--queries", type=int, default=500, help="Queries per query benchmark")
+    parser.add_argument("--renders", type=int, default=10, help="Charts per render benchmark")
+    parser.add_argument("--load-runs", type=int, default=3, help="Repetitions of each load benchmark")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Write the JSON report here")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Stored report to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before flagging (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    report = {
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "matplotlib": matplotlib.__version__,
+                "platform": platform.platform()
+                },
+            "scales": {}
+            }
+    for scale in args.scales:
+        print(f"--- Scale x{scale:g} ---")
+        report["scales"][f"x{scale:g}"] = benchScale(scale, args.queries, args.renders, args.load_runs, args.seed)
+
+    regressions = []
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f: baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+    report["regressions"] = regressions
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f: f.write(text)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f: f.write(text)
+        print(f"Saved baseline to {args.baseline}")
+    print(text)
+
+    for line in regressions:
+        print(f"REGRESSION: {line}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
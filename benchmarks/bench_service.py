@@ -0,0 +1,131 @@
+"""
+Load test for service.py on the bundled dataset.
+
+Starts the service in-process on an ephemeral port, then drives it from
+--connections keep-alive client connections, each sending --requests requests
+(a mix of /analysis and /trend queries). Also times a /batch call and PNG
+renders. Prints a JSON report with the client-side throughput and latency
+percentiles plus the server's own /metrics.
+
+    python benchmarks/bench_service.py --connections 32 --requests 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+from urllib.parse import urlencode
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+
+import loader
+import registry
+import service
+
+OPERATIONS = ["average", "sum", "max", "min"]
+
+# --- Client ---
+
+async def request(reader, writer, method, path, body=b""):
+    writer.write((f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n\r\n").encode() + body)
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length = next(int(line.split(b":")[1]) for line in head.split(b"\r\n") if line.lower().startswith(b"content-length"))
+    return status, await reader.readexactly(length)
+
+def randomQuery(rng, dataset):
+    if rng.random() < 0.7:
+        params = {"region": rng.choice(dataset.index.regionNames), "year": rng.choice(dataset.years.tolist()),
+                  "operation": rng.choice(OPERATIONS)}
+        return "/analysis?" + urlencode(params)
+    start = rng.choice(dataset.years.tolist())
+    params = {"country": rng.choice(dataset.countries.tolist()), "start_year": start,
+              "end_year": rng.randint(start, int(dataset.years[-1]))}
+    return "/trend?" + urlencode(params)
+
+async def clientLoop(port, paths, latencies, failures):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for path in paths:
+        start = time.perf_counter()
+        status, _ = await request(reader, writer, "GET", path)
+        latencies.append(time.perf_counter() - start)
+        if status >= 500:
+            failures.append(path)
+    writer.close()
+
+async def drive(port, dataset, args):
+    rng = random.Random(args.seed)
+    latencies, failures = [], []
+    jobs = [[randomQuery(rng, dataset) for _ in range(args.requests)] for _ in range(args.connections)]
+
+    start = time.perf_counter()
+    await asyncio.gather(*(clientLoop(port, paths, latencies, failures) for paths in jobs))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+    report = {
+            "connections": args.connections,
+            "requests": len(latencies),
+            "failures": len(failures),
+            "elapsed_s": elapsed,
+            "requests_per_s": len(latencies) / elapsed,
+            "p50_ms": pick(0.50),
+            "p95_ms": pick(0.95),
+            "p99_ms": pick(0.99)
+            }
+
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    analyses = [{"type": "region", "region": r, "year": y, "operation": "sum"}
+                for r in dataset.index.regionNames for y in dataset.years.tolist()]
+    start = time.perf_counter()
+    status, body = await request(reader, writer, "POST", "/batch", json.dumps({"analyses": analyses}).encode())
+    report["batch"] = {"analyses": len(analyses), "status": status, "ms": (time.perf_counter() - start) * 1000}
+
+    renders = []
+    for _ in range(args.renders):
+        start = time.perf_counter()
+        status, body = await request(reader, writer, "GET", randomQuery(rng, dataset) + "&format=png")
+        renders.append((time.perf_counter() - start) * 1000)
+    report["png_render_ms"] = sorted(renders)[len(renders) // 2] if renders else None
+
+    status, body = await request(reader, writer, "GET", "/metrics")
+    report["server_metrics"] = json.loads(body)
+    writer.close()
+    return report
+
+# --- Main ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the HTTP query service.")
+    parser.add_argument("--connections", type=int, default=32, help="Concurrent keep-alive connections")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per connection")
+    parser.add_argument("--renders", type=int, default=5, help="PNG renders to time")
+    parser.add_argument("--data", default=os.path.join(REPO_ROOT, service.DEFAULT_DATA))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    data = registry.registryFromConfig({}, loader.loadDataset(args.data))
+    svc = service.QueryService(data)
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(svc.start(port=0))
+    port = server.sockets[0].getsockname()[1]
+    threading.Thread(target=loop.run_forever, name="service", daemon=True).start()
+
+    try:
+        report = asyncio.run(drive(port, data.get(), args))
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        svc.close()
+
+    print(json.dumps(report, indent=2))
+    return 1 if report["failures"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
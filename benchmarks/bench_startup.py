@@ -0,0 +1,83 @@
+"""
+Startup-time benchmark for mainGUI.
+
+Each run starts a fresh interpreter and records:
+  import_ms      - time to import mainGUI
+  first_paint_ms - time until the Tk window has been built and drawn (needs a display)
+  data_ready_ms  - time until the background dataset load has finished
+and whether matplotlib was imported before the first chart was requested.
+
+    python benchmarks/bench_startup.py --runs 10 --budget-ms 500
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import mainGUI
+out = {"import_ms": (time.perf_counter() - t0) * 1000}
+try:
+    import tkinter as tk
+    root = tk.Tk()
+    app = mainGUI.GDPDashboardGUI(root)
+    root.update()
+    out["first_paint_ms"] = (time.perf_counter() - t0) * 1000
+    app.data_future.result()
+    out["data_ready_ms"] = (time.perf_counter() - t0) * 1000
+    root.destroy()
+except tk.TclError as e:
+    out["display_error"] = str(e)
+    mainGUI.load_in_background(mainGUI.DATA_FILE).result()
+    out["data_ready_ms"] = (time.perf_counter() - t0) * 1000
+out["matplotlib_loaded"] = "matplotlib" in sys.modules
+print(json.dumps(out))
+"""
+
+def runOnce():
+    proc = subprocess.run([sys.executable, "-c", CHILD], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def summarize(samples, key):
+    values = [s[key] for s in samples if key in s]
+    if not values:
+        return None
+    return {"median": statistics.median(values), "min": min(values), "max": max(values)}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure mainGUI startup time.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="Fail if median first paint (or import time when headless) exceeds this")
+    parser.add_argument("--output", default=None, help="Write the JSON report here")
+    args = parser.parse_args(argv)
+
+    samples = [runOnce() for _ in range(args.runs)]
+    report = {
+            "runs": args.runs,
+            "import_ms": summarize(samples, "import_ms"),
+            "first_paint_ms": summarize(samples, "first_paint_ms"),
+            "data_ready_ms": summarize(samples, "data_ready_ms"),
+            "matplotlib_loaded_at_startup": any(s["matplotlib_loaded"] for s in samples),
+            "headless": any("display_error" in s for s in samples)
+            }
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f: f.write(text)
+
+    failed = report["matplotlib_loaded_at_startup"]
+    if args.budget_ms is not None:
+        gate = report["first_paint_ms"] or report["import_ms"]
+        failed = failed or gate["median"] > args.budget_ms
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""
+Synthetic GDP CSVs in the same schema as gdp_with_continent_filled.csv.
+
+Scale 1 matches the bundled file's row count; scale N writes N times as many
+entities. Rows are streamed to disk, so large scales never sit in memory.
+
+    python benchmarks/synth.py 100 -o benchmarks/.data/gdp_x100.csv
+"""
+import argparse
+import csv
+import os
+import random
+
+BASE_ROWS = 266
+YEARS = list(range(1960, 2025))
+CONTINENTS = ["Africa", "Asia", "Europe", "Global", "North America", "Oceania", "South America"]
+HEADER = ["Country Name", "Country Code", "Indicator Name", "Indicator Code"] + [str(y) for y in YEARS] + ["Continent"]
+LATE_START_RATE = 0.3     # entities whose series starts after 1960
+GAP_RATE = 0.015          # sporadic empty cells inside a series
+
+def entityCode(i):
+    letters = []
+    while True:
+        i, r = divmod(i, 26)
+        letters.append(chr(65 + r))
+        if i == 0:
+            break
+    return "".join(reversed(letters)).rjust(3, "A")
+
+def syntheticRow(i, rng):
+    # Each entity gets a starting level and a growth rate; early years are
+    # often missing, like the real World Bank series.
+    level = 10 ** rng.uniform(7, 12.5)
+    growth = rng.uniform(-0.02, 0.08)
+    firstYear = rng.choice(YEARS[:40]) if rng.random() < LATE_START_RATE else YEARS[0]
+
+    cells = []
+    for year in YEARS:
+        level *= 1 + growth + rng.gauss(0, 0.03)
+        if year < firstYear or rng.random() < GAP_RATE:
+            cells.append("")
+        else:
+            cells.append(repr(round(level, 6)))
+
+    return [f"Country {i:07d}", entityCode(i), "GDP (current US$)", "NY.GDP.MKTP.CD"] + cells + [rng.choice(CONTINENTS)]
+
+def generateCSV(path, scale, seed=0):
+    """Writes BASE_ROWS * scale synthetic rows to path and returns the row count."""
+    rng = random.Random(seed)
+    rows = int(BASE_ROWS * scale)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        for i in range(rows):
+            writer.writerow(syntheticRow(i, rng))
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic GDP CSV.")
+    parser.add_argument("scale", type=float, help="Multiple of the bundled dataset's row count")
+    parser.add_argument("-o", "--output", required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(f"Wrote {generateCSV(args.output, args.scale, args.seed)} rows to {args.output}")
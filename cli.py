@@ -0,0 +1,105 @@
+"""
+Headless batch runner: renders every analysis in a config.json to image files.
+
+    python cli.py config.json --output charts --format png svg --workers 8
+"""
+import argparse
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+# Must run before visualizer pulls in pyplot so no GUI backend is ever loaded.
+import matplotlib
+matplotlib.use("Agg")
+
+import instrument
+import planner
+import registry
+import visualizer
+
+DEFAULT_DATA = "gdp_with_continent_filled.csv"
+DEFAULT_OUTPUT = "output"
+DEFAULT_GRAPHS = {"region": "bar", "country_trend": "line", "growth": "bar", "ranking": "bar"}
+
+# --- Helper Functions ---
+
+def slugify(text):
+    return re.sub(r"[^a-z0-9]+", "_", str(text).lower()).strip("_")
+
+def outputStem(i, analysis):
+    if analysis["type"] in ("growth", "ranking"):
+        subject = analysis.get("country") or analysis.get("region") or "all"
+    else:
+        subject = analysis.get("region") if analysis["type"] == "region" else analysis.get("country")
+    return f"{i + 1:03d}_{analysis['type']}_{slugify(subject)}"
+
+def renderJob(job):
+    """Process-pool worker: renders one result to one or more files."""
+    result, paths = job
+    written = [path for path in paths if visualizer.saveDashboard(result, path)]
+    return written
+
+def buildJobs(analyses, results, outputDir, formats):
+    jobs = []
+    for i, (analysis, result) in enumerate(zip(analyses, results)):
+        if result is None:
+            print(f"Skipping analysis #{i + 1}: no matching data.")
+            continue
+        result["graph"] = analysis.get("graph", result.get("graph", DEFAULT_GRAPHS.get(analysis["type"], "bar")))
+        stem = os.path.join(outputDir, outputStem(i, analysis))
+        jobs.append((result, [f"{stem}.{fmt}" for fmt in formats]))
+    return jobs
+
+def parseArgs(argv):
+    parser = argparse.ArgumentParser(description="Render every analysis in a config file to image files.")
+    parser.add_argument("config", help="Path to a config.json file")
+    parser.add_argument("-o", "--output", help=f"Directory for rendered charts (default: the config's \"output\", else {DEFAULT_OUTPUT})")
+    parser.add_argument("-f", "--format", nargs="+", default=["png"], choices=["png", "svg"], help="Image format(s)")
+    parser.add_argument("-d", "--data", default=DEFAULT_DATA, help="GDP CSV file")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(), help="Rendering processes")
+    return parser.parse_args(argv)
+
+# --- Main ---
+
+def main(argv=None):
+    args = parseArgs(argv)
+
+    try:
+        with open(args.config, "r") as f: config = json.load(f)
+    except Exception as e:
+        print(f"Error: Could not read JSON file: {e}")
+        return 1
+
+    if not planner.validateConfig(config):
+        return 1
+    instrument.configure(config)
+
+    try:
+        data = registry.registryFromConfig(config, args.data)
+    except Exception as e:
+        print(f"Error: Could not register datasets: {e}")
+        return 1
+    results = planner.runAnalyses(data, config["analyses"])
+
+    outputDir = args.output or config.get("output") or DEFAULT_OUTPUT
+    os.makedirs(outputDir, exist_ok=True)
+    jobs = buildJobs(config["analyses"], results, outputDir, args.format)
+
+    written = []
+    if args.workers and args.workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            for paths in pool.map(renderJob, jobs, chunksize=max(1, len(jobs) // (args.workers * 4))):
+                written.extend(paths)
+    else:
+        for job in jobs:
+            written.extend(renderJob(job))
+
+    for path in written:
+        print(f"Wrote {path}")
+    print(f"Rendered {len(written)} file(s) from {len(config['analyses'])} analyses into '{outputDir}'.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
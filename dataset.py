@@ -0,0 +1,239 @@
+import itertools
+import sys
+from collections.abc import Sequence
+from functools import cached_property
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from rangestats import RangeIndex, RegionRollup
+
+# Every dataset instance gets a fresh token, so caches keyed on it go stale on reload.
+_versions = itertools.count(1)
+
+# World Bank aggregate rows (geographic, income and lending groups) mixed in with the countries.
+AGGREGATE_CODES = frozenset({
+        "AFE", "AFW", "ARB", "CEB", "CSS", "EAP", "EAR", "EAS", "ECA", "ECS", "EMU", "EUU",
+        "FCS", "HIC", "HPC", "IBD", "IBT", "IDA", "IDB", "IDX", "INX", "LAC", "LCN", "LDC",
+        "LIC", "LMC", "LMY", "LTE", "MEA", "MIC", "MNA", "NAC", "OED", "OSS", "PRE", "PSS",
+        "PST", "SAS", "SSA", "SSF", "SST", "TEA", "TEC", "TLA", "TMN", "TSA", "TSS", "UMC", "WLD"
+        })
+# Continent labels that only ever hold aggregates.
+AGGREGATE_REGIONS = frozenset({"Global"})
+
+# --- Helper Functions ---
+
+def internStrings(values: Iterable[str]) -> np.ndarray:
+    """Builds an object array of interned strings so repeated labels share memory."""
+    return np.array([sys.intern(str(v)) for v in values], dtype=object)
+
+def isAggregate(code: str, region: str) -> bool:
+    """True for group rows (e.g. "Africa Eastern and Southern", "World") rather than sovereign entities."""
+    return str(code).upper() in AGGREGATE_CODES or region in AGGREGATE_REGIONS
+
+# --- Columnar Store ---
+
+class GDPDataset:
+    """
+    Columnar GDP store: a dense (entity x year) float64 matrix with NaN for
+    missing cells, a boolean validity mask, and interned label arrays.
+    """
+
+    def __init__(self, years, values, countries, codes, regions, mask=None):
+        self.years = np.asarray(years, dtype=np.int64)
+        self.values = np.asarray(values, dtype=np.float64).reshape(len(countries), len(self.years))
+        self.mask = ~np.isnan(self.values) if mask is None else np.asarray(mask, dtype=bool)
+        self.countries = internStrings(countries)
+        self.codes = internStrings(codes)
+        self.regions = internStrings(regions)
+        self.version = next(_versions)
+
+        # Provenance, filled in by the loader: which indicator series and which file.
+        self.indicatorCode: Optional[str] = None
+        self.indicatorName: Optional[str] = None
+        self.source: Optional[str] = None
+
+        # Per-row Indicator Code/Name, only set on streamed batches of multi-indicator exports (loader.iterBatches).
+        self.rowIndicators: Optional[np.ndarray] = None
+        self.rowIndicatorNames: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.countries)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate in-memory size of the numeric arrays, for memory budgeting."""
+        return self.values.nbytes + self.mask.nbytes
+
+    @classmethod
+    def empty(cls) -> "GDPDataset":
+        return cls([], np.empty((0, 0)), [], [], [])
+
+    @classmethod
+    def fromRecords(cls, records: Iterable[Dict[str, Any]], years: Optional[Iterable[int]] = None) -> "GDPDataset":
+        """Packs records in the loader.cleanRow shape into a dataset."""
+        if years is None:
+            records = list(records)
+            years = sorted({y for r in records for y in r["gdp"]})
+        years = list(years)
+        columns = {y: i for i, y in enumerate(years)}
+
+        countries, codes, regions, rows = [], [], [], []
+        for record in records:
+            row = np.full(len(years), np.nan)
+            for year, value in record["gdp"].items():
+                col = columns.get(year)
+                if col is not None:
+                    row[col] = value
+            countries.append(record["country"])
+            codes.append(record["code"])
+            regions.append(record["region"])
+            rows.append(row)
+
+        values = np.vstack(rows) if rows else np.empty((0, len(years)))
+        return cls(years, values, countries, codes, regions)
+
+    @cached_property
+    def index(self) -> "GDPIndex":
+        """Lookup tables shared by every caller; built on first access."""
+        return GDPIndex(self)
+
+    @cached_property
+    def ranges(self) -> "RangeIndex":
+        """Prefix-sum/sparse-table index for O(1) year-range statistics."""
+        return RangeIndex(self)
+
+    @cached_property
+    def aggregate(self) -> np.ndarray:
+        """Boolean per row: True for aggregate rows, which region statistics leave out."""
+        return np.fromiter((isAggregate(c, r) for c, r in zip(self.codes, self.regions)), dtype=bool, count=len(self))
+
+    @cached_property
+    def rollup(self) -> "RegionRollup":
+        """Region x year sum/count/min/max cube over sovereign rows."""
+        return RegionRollup(self)
+
+    @classmethod
+    def concat(cls, parts: List["GDPDataset"]) -> "GDPDataset":
+        """Stacks datasets that share the same year columns."""
+        if not parts:
+            return cls.empty()
+        return cls(parts[0].years,
+                   np.vstack([p.values for p in parts]),
+                   np.concatenate([p.countries for p in parts]),
+                   np.concatenate([p.codes for p in parts]),
+                   np.concatenate([p.regions for p in parts]),
+                   mask=np.vstack([p.mask for p in parts]))
+
+    def select(self, rows: np.ndarray) -> "GDPDataset":
+        """A new dataset holding just the given rows (labels, values and mask copied)."""
+        subset = GDPDataset(self.years, self.values[rows], self.countries[rows], self.codes[rows],
+                            self.regions[rows], mask=self.mask[rows])
+        subset.indicatorCode, subset.indicatorName, subset.source = self.indicatorCode, self.indicatorName, self.source
+        return subset
+
+    def touch(self) -> None:
+        """Takes a fresh version after an in-place change (see watcher.applyPatch)."""
+        self.version = next(_versions)
+
+    def yearColumn(self, year) -> Optional[int]:
+        return self.index.yearColumn(year)
+
+    def regionRows(self, regionName: str) -> np.ndarray:
+        return self.index.rowsForRegion(regionName)
+
+    def record(self, row: int) -> Dict[str, Any]:
+        """Returns one entity in the legacy loader.cleanRow dict shape."""
+        valid = self.mask[row]
+        return {
+                "country": self.countries[row],
+                "code": self.codes[row],
+                "region": self.regions[row],
+                "gdp": dict(zip(self.years[valid].tolist(), self.values[row, valid].tolist()))
+                }
+
+    def records(self) -> "RecordView":
+        return RecordView(self)
+
+# --- Lookup Index ---
+
+class GDPIndex:
+    """
+    Constant-time country, code, region and year lookups over a GDPDataset.
+    Countries and codes cover every row; regions only list sovereign rows
+    (aggregates get region id -1), so a region is never double-counted.
+    """
+
+    def __init__(self, dataset: GDPDataset):
+        self.countryRows: Dict[str, int] = {}
+        self.codeRows: Dict[str, int] = {}
+        for row, (country, code) in enumerate(zip(dataset.countries, dataset.codes)):
+            # First occurrence wins, matching the old linear scans.
+            self.countryRows.setdefault(country.casefold(), row)
+            self.codeRows.setdefault(code.upper(), row)
+
+        sovereign = ~dataset.aggregate
+        self.regionNames: List[str] = sorted(set(dataset.regions[sovereign]))
+        regionIds = {name: i for i, name in enumerate(self.regionNames)}
+        self.regionIds = np.array([regionIds[r] if keep else -1 for r, keep in zip(dataset.regions, sovereign)],
+                                  dtype=np.int64)
+
+        order = np.argsort(self.regionIds, kind="stable")
+        bounds = np.searchsorted(self.regionIds[order], np.arange(len(self.regionNames) + 1))
+        self.regionRows: Dict[str, np.ndarray] = {
+                name: order[bounds[i]:bounds[i + 1]]
+                for i, name in enumerate(self.regionNames)
+                }
+
+        self.yearColumns: Dict[int, int] = {int(y): i for i, y in enumerate(dataset.years)}
+
+    def findCountry(self, name: str) -> Optional[int]:
+        return self.countryRows.get(name.casefold())
+
+    def findCode(self, code: str) -> Optional[int]:
+        return self.codeRows.get(code.upper())
+
+    def rowsForRegion(self, regionName: str) -> np.ndarray:
+        return self.regionRows.get(regionName, EMPTY_ROWS)
+
+    def yearColumn(self, year) -> Optional[int]:
+        return self.yearColumns.get(year)
+
+EMPTY_ROWS = np.empty(0, dtype=np.int64)
+
+# --- Compatibility View ---
+
+class RecordView(Sequence):
+    """Read-only list-of-dicts view over a GDPDataset, built lazily per row."""
+
+    def __init__(self, dataset: GDPDataset):
+        self.dataset = dataset
+
+    def __len__(self) -> int:
+        return len(self.dataset)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.dataset.record(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("record index out of range")
+        return self.dataset.record(index)
+
+    def __repr__(self) -> str:
+        return f"RecordView({len(self)} records)"
+
+def asDataset(data, indicator: Optional[str] = None) -> GDPDataset:
+    """
+    Accepts a GDPDataset, a RecordView, a legacy list of dicts, or anything with a
+    datasetFor(indicator) method (registry.DatasetRegistry), which picks the series.
+    """
+    if hasattr(data, "datasetFor"):
+        return data.datasetFor(indicator)
+    if isinstance(data, GDPDataset):
+        return data
+    dataset = getattr(data, "dataset", None)
+    if isinstance(dataset, GDPDataset):
+        return dataset
+    return GDPDataset.fromRecords(data)
@@ -0,0 +1,108 @@
+import numpy as np
+
+# Metrics understood by the "growth" analysis type.
+GROWTH_METRICS = ("cagr", "yoy", "volatility", "rolling_mean")
+DEFAULT_WINDOW = 5
+
+# --- Helper Functions ---
+
+def emptyScores(dataset):
+    return np.full(len(dataset), np.nan)
+
+def windowColumns(dataset, startYear, endYear):
+    return dataset.ranges.columnSpan(startYear, endYear)
+
+def nanMoments(values):
+    """Per-row count, mean and population std of a NaN-padded matrix, without warnings for empty rows."""
+    valid = ~np.isnan(values)
+    counts = valid.sum(axis=1)
+    filled = np.where(valid, values, 0.0)
+    means = np.divide(filled.sum(axis=1), counts, out=np.full(len(values), np.nan), where=counts > 0)
+    spread = np.where(valid, values - means[:, None], 0.0)
+    stds = np.sqrt(np.divide((spread ** 2).sum(axis=1), counts, out=np.full(len(values), np.nan), where=counts > 1))
+    return counts, means, stds
+
+# --- Matrix Operations ---
+
+def yoyGrowth(dataset, startYear, endYear):
+    """
+    Year-over-year growth of every entity for the years in (startYear, endYear]:
+    returns (years, growth) with growth shaped (entities, len(years)) and NaN
+    where either year is missing or the base year is zero.
+    """
+    lo, hi = windowColumns(dataset, startYear, endYear)
+    lo += 1  # the first year in the window is only a base
+    if hi <= lo:
+        return dataset.years[:0], np.empty((len(dataset), 0))
+
+    prev, cur = dataset.values[:, lo - 1:hi - 1], dataset.values[:, lo:hi]
+    valid = dataset.mask[:, lo - 1:hi - 1] & dataset.mask[:, lo:hi] & (prev != 0)
+    growth = np.full(cur.shape, np.nan)
+    np.divide(cur, prev, out=growth, where=valid)
+    return dataset.years[lo:hi], growth - 1.0
+
+def cagr(dataset, startYear, endYear):
+    """
+    Compound annual growth rate of every entity between its first and last
+    observation inside [startYear, endYear]; NaN with fewer than two
+    observations or a non-positive endpoint.
+    """
+    lo, hi = windowColumns(dataset, startYear, endYear)
+    if hi - lo < 2:
+        return emptyScores(dataset)
+
+    mask = dataset.mask[:, lo:hi]
+    values = dataset.values[:, lo:hi]
+    years = dataset.years[lo:hi]
+    rows = np.arange(len(dataset))
+    first = mask.argmax(axis=1)
+    last = (hi - lo - 1) - mask[:, ::-1].argmax(axis=1)
+
+    start, end = values[rows, first], values[rows, last]
+    span = (years[last] - years[first]).astype(np.float64)
+    valid = mask.any(axis=1) & (span > 0) & (start > 0) & (end > 0)
+
+    scores = emptyScores(dataset)
+    scores[valid] = (end[valid] / start[valid]) ** (1.0 / span[valid]) - 1.0
+    return scores
+
+def rollingMean(dataset, window, startYear=None, endYear=None):
+    """
+    Trailing window-year mean of every entity from the range prefix sums:
+    returns (years, means) for the windows ending inside [startYear, endYear];
+    a window with any missing year is NaN.
+    """
+    ranges = dataset.ranges
+    sums = ranges.prefixSum[:, window:] - ranges.prefixSum[:, :-window]
+    counts = ranges.prefixCount[:, window:] - ranges.prefixCount[:, :-window]
+    means = np.divide(sums, counts, out=np.full(sums.shape, np.nan), where=counts == window)
+    years = dataset.years[window - 1:]
+
+    keep = np.ones(len(years), dtype=bool)
+    if startYear is not None:
+        keep &= years >= startYear
+    if endYear is not None:
+        keep &= years <= endYear
+    return years[keep], means[:, keep]
+
+def volatility(dataset, startYear, endYear):
+    """Standard deviation of each entity's year-over-year growth inside the window (NaN below two points)."""
+    _, growth = yoyGrowth(dataset, startYear, endYear)
+    return nanMoments(growth)[2]
+
+def meanGrowth(dataset, startYear, endYear):
+    _, growth = yoyGrowth(dataset, startYear, endYear)
+    return nanMoments(growth)[1]
+
+def metricScores(dataset, metric, startYear, endYear, window=DEFAULT_WINDOW):
+    """One score per entity for ranking: the metric over the window (rolling_mean: the window ending at endYear)."""
+    if metric == "cagr":
+        return cagr(dataset, startYear, endYear)
+    if metric == "yoy":
+        return meanGrowth(dataset, startYear, endYear)
+    if metric == "volatility":
+        return volatility(dataset, startYear, endYear)
+    if metric == "rolling_mean":
+        _, means = rollingMean(dataset, window, endYear, endYear)
+        return means[:, 0] if means.shape[1] else emptyScores(dataset)
+    raise ValueError(f"Unknown growth metric '{metric}'")
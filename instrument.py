@@ -0,0 +1,210 @@
+"""
+Opt-in timing spans, counters and cProfile capture for the hot paths.
+
+Off by default; every hook then reduces to one flag check. Turn it on with
+    GDP_INSTRUMENT=1             collect spans and counters
+    GDP_INSTRUMENT_OUTPUT=path   write them as JSON at exit
+    GDP_PROFILE=path             also run cProfile on every thread and dump merged pstats at exit
+or from a config.json:
+    "instrumentation": {"enabled": true, "output": "metrics.json", "profile": "run.pstats"}
+"""
+import atexit
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from functools import wraps
+
+class InstrumentState:
+    def __init__(self):
+        self.enabled = False
+        self.output = None
+        self.profilePath = None
+        self.profiling = False
+        self.profilers = []
+        self.spans = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+
+_state = InstrumentState()
+_local = threading.local()
+
+# --- Spans And Counters ---
+
+class Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        if _state.profiling:
+            profileThread()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+class NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NULL_SPAN = NullSpan()
+
+def span(name):
+    """with span("plot.layout"): ...  - times the block when instrumentation is on."""
+    return Span(name) if _state.enabled else NULL_SPAN
+
+def timed(name):
+    """Decorator form of span()."""
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _state.enabled:
+                return func(*args, **kwargs)
+            if _state.profiling:
+                profileThread()
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+def count(name, amount=1):
+    if _state.enabled:
+        with _state.lock:
+            _state.counters[name] = _state.counters.get(name, 0) + amount
+
+def record(name, seconds):
+    with _state.lock:
+        entry = _state.spans.get(name)
+        if entry is None:
+            entry = _state.spans[name] = [0, 0.0, 0.0]
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] = max(entry[2], seconds)
+
+# --- Profiling ---
+
+def profileThread():
+    """
+    Starts profiling the calling thread. cProfile only sees the thread that
+    enabled it, so each thread gets its own profiler, merged by dumpProfile().
+    """
+    if getattr(_local, "active", False):
+        return
+    _local.active = True
+    profiler = getattr(_local, "profiler", None)
+    if profiler is None:
+        profiler = _local.profiler = cProfile.Profile()
+        with _state.lock:
+            _state.profilers.append(profiler)
+    try:
+        profiler.enable()
+    except ValueError:
+        pass  # Python 3.12+: profiling is interpreter-wide and already on
+
+def profileNewThread(frame, event, arg):
+    # Installed with threading.setprofile; swaps itself for a real profiler on first call
+    sys.setprofile(None)
+    if _state.profiling:
+        profileThread()
+
+class ProfileSnapshot:
+    """Stats of a running profiler in the shape pstats.Stats loads, without disabling it."""
+
+    def __init__(self, profiler):
+        profiler.snapshot_stats()
+        self.stats = profiler.stats
+
+    def create_stats(self):
+        pass
+
+# --- Control ---
+
+def enabled():
+    return _state.enabled
+
+def enable(output=None, profile=None):
+    """Starts collecting; output/profile are paths written by finish() (and at exit)."""
+    _state.enabled = True
+    _state.output = output or _state.output
+    if profile and not _state.profiling:
+        # New threads start profiled; existing ones (e.g. pool workers) on their first span
+        _state.profilePath = profile
+        _state.profiling = True
+        threading.setprofile(profileNewThread)
+        profileThread()
+
+def disable():
+    """Stops collecting; other threads' profilers stop when their thread exits."""
+    _state.enabled = False
+    _state.profiling = False
+    threading.setprofile(None)
+    if getattr(_local, "active", False):
+        _local.profiler.disable()
+        _local.active = False
+
+def reset():
+    with _state.lock:
+        _state.spans.clear()
+        _state.counters.clear()
+
+def configure(config):
+    """Applies a config.json "instrumentation" section, if present."""
+    settings = config.get("instrumentation")
+    if isinstance(settings, dict) and settings.get("enabled", True):
+        enable(settings.get("output"), settings.get("profile"))
+    elif settings is True:
+        enable()
+
+# --- Export ---
+
+def report():
+    with _state.lock:
+        spans = {
+                name: {"calls": calls, "total_ms": total * 1000, "mean_ms": total / calls * 1000, "max_ms": peak * 1000}
+                for name, (calls, total, peak) in sorted(_state.spans.items())
+                }
+        return {"spans": spans, "counters": dict(sorted(_state.counters.items()))}
+
+def exportJSON(path):
+    with open(path, "w") as f:
+        json.dump(report(), f, indent=2)
+
+def dumpProfile(path):
+    """Writes the cProfile data collected so far, merged over all threads, in pstats format (python -m pstats path)."""
+    with _state.lock:
+        snapshots = [ProfileSnapshot(profiler) for profiler in _state.profilers]
+    snapshots = [snapshot for snapshot in snapshots if snapshot.stats]
+    if not snapshots:
+        return False
+    stats = pstats.Stats(snapshots[0])
+    for snapshot in snapshots[1:]:
+        stats.add(snapshot)
+    stats.dump_stats(path)
+    return True
+
+def finish():
+    """Writes whatever outputs were requested; safe to call more than once."""
+    if _state.output and (_state.spans or _state.counters):
+        exportJSON(_state.output)
+        print(f"Instrumentation written to {_state.output}")
+    if _state.profilePath and dumpProfile(_state.profilePath):
+        print(f"Profile written to {_state.profilePath}")
+
+if os.environ.get("GDP_INSTRUMENT") or os.environ.get("GDP_PROFILE"):
+    enable(os.environ.get("GDP_INSTRUMENT_OUTPUT"), os.environ.get("GDP_PROFILE"))
+atexit.register(finish)
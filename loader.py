@@ -1,24 +1,32 @@
 import csv
-from typing import List, Dict, Any
+import math
+import os
+import re
+import warnings
+from itertools import islice
+from typing import Dict, Any, Iterator, List, Sequence
+
+import numpy as np
+
+import instrument
+import snapshot
+from dataset import GDPDataset, internStrings
 
 def isYearColumn(header: str) -> bool:
 
     return header.isdigit() and len(header) == 4
 
 def parseGDP(value: str) -> float:
-
+    """Parses one GDP cell; blank or unparsable cells are missing (NaN), never 0.0."""
     try:
         return float(value)
     except ValueError:
-        return 0.0
+        return math.nan
 
 def cleanRow(row: Dict[str, str]) -> Dict[str, Any]:
 
-    gdpData = {
-            int(k): parseGDP(v)
-            for k, v in row.items()
-            if isYearColumn(k) and v.strip() != ""
-            }
+    parsed = ((int(k), parseGDP(v)) for k, v in row.items() if isYearColumn(k))
+    gdpData = {year: value for year, value in parsed if not math.isnan(value)}
 
     return {
             "country": row.get("Country Name", "Unknown"),
@@ -27,20 +35,229 @@ def cleanRow(row: Dict[str, str]) -> Dict[str, Any]:
             "gdp": gdpData
             }
 
-def loadData(filename: str) -> List[Dict[str, Any]]:
+# --- Fast Columnar Parsing ---
+
+# Rows converted per chunk; bounds the temporary string matrix (~rows x years x 4 bytes/char).
+PARSE_CHUNK_ROWS = 8192
+
+# np.fromstring reads a whitespace-only cell as -1.0, so any whitespace sends the chunk to the csv path.
+WHITESPACE = re.compile(r"\s")
+
+LABEL_COLUMNS = (("country", "Country Name", "Unknown"),
+                 ("code", "Country Code", "N/A"),
+                 ("region", "Continent", "Unknown"),
+                 ("indicatorCode", "Indicator Code", None),
+                 ("indicatorName", "Indicator Name", None))
+
+def classifyHeader(header: List[str]) -> Dict[str, Any]:
+    """Classifies the header once: year columns (in year order) and label column positions."""
+    yearPositions = sorted((int(h), i) for i, h in enumerate(header) if isYearColumn(h))
+    yearIndices = [i for _, i in yearPositions]
+
+    # The text fast path needs the year columns as one contiguous, ascending block.
+    block = None
+    if yearIndices and yearIndices == list(range(yearIndices[0], yearIndices[0] + len(yearIndices))):
+        block = (yearIndices[0], len(header) - yearIndices[-1] - 1)
+
+    return {
+            "width": len(header),
+            "years": [y for y, _ in yearPositions],
+            "yearIndices": yearIndices,
+            "yearBlock": block,
+            "labels": {key: (header.index(name) if name in header else None, default)
+                       for key, name, default in LABEL_COLUMNS}
+            }
+
+def splitLine(line: str, lead: int, tail: int, yearCount: int):
+    """Splits one CSV line into (label fields, raw year block text), or None if it doesn't fit."""
+    if '"' in line:
+        fields = next(csv.reader([line]))
+        if len(fields) != lead + yearCount + tail:
+            return None
+        return fields[:lead] + fields[lead + yearCount:], ",".join(fields[lead:lead + yearCount])
+
+    head = line.split(",", lead)
+    if len(head) <= lead:
+        return None
+    parts = head.pop().rsplit(",", tail) if tail else [head.pop()]
+    if len(parts) != tail + 1 or parts[0].count(",") != yearCount - 1:
+        return None
+    return head + parts[1:], parts[0]
+
+def convertLinesFast(lines: List[str], layout: Dict[str, Any]):
+    """
+    Converts a chunk of raw CSV lines without building per-row lists or dicts:
+    the year blocks are joined into one string and parsed in a single
+    np.fromstring call. Returns None when the chunk needs the exact csv path
+    (non-contiguous years, ragged rows, whitespace or text in year cells).
+    """
+    if layout["yearBlock"] is None:
+        return None
+    lead, tail = layout["yearBlock"]
+    yearCount = len(layout["years"])
+
+    labelRows, blocks = [], []
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if not line:
+            continue
+        split = splitLine(line, lead, tail, yearCount)
+        if split is None:
+            return None
+        labelRows.append(split[0])
+        blocks.append(split[1])
+
+    joined = ",".join(blocks)
+    if WHITESPACE.search(joined):
+        return None
+
+    # Blank cells become "nan"; two passes catch runs of consecutive blanks.
+    text = ("," + joined + ",").replace(",,", ",nan,").replace(",,", ",nan,")[1:-1]
     try:
-        with open(filename, mode='r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
+        with warnings.catch_warnings():
+            # Older NumPy only warns (and truncates) on unparsable text; newer raises.
+            warnings.simplefilter("ignore", DeprecationWarning)
+            values = np.fromstring(text, sep=",") if blocks else np.empty(0)
+    except ValueError:
+        return None
+    if values.size != len(blocks) * yearCount:
+        return None
+
+    # Label fields sit before or after the year block in each split row.
+    labels = {}
+    for key, (i, default) in layout["labels"].items():
+        if i is None:
+            labels[key] = [default] * len(labelRows)
+        else:
+            pos = i if i < lead else i - yearCount
+            labels[key] = [row[pos] for row in labelRows]
+
+    return packChunk(layout, values.reshape(len(blocks), yearCount), labels)
+
+def convertYearCells(rows: List[List[str]], yearIndices: List[int]) -> np.ndarray:
+    """
+    Converts the year cells of a chunk of rows into a float64 matrix in bulk.
+    Blank and unparsable cells both become NaN, i.e. invalid in the dataset mask.
+    """
+    if not rows or not yearIndices:
+        return np.empty((len(rows), len(yearIndices)))
+
+    cells = np.array([[row[i] for i in yearIndices] for row in rows])
+    blank = np.char.strip(cells) == ""
+    cells[blank] = "nan"
+    try:
+        values = cells.astype(np.float64)
+    except ValueError:
+        values = np.vectorize(parseGDP, otypes=[np.float64])(cells)
+    values[blank] = np.nan
+    return values
+
+def convertChunk(rows: List[List[str]], layout: Dict[str, Any]) -> GDPDataset:
+    width = layout["width"]
+    rows = [row if len(row) >= width else row + [""] * (width - len(row)) for row in rows if row]
+
+    labels = {key: [row[i] for row in rows] if i is not None else [default] * len(rows)
+              for key, (i, default) in layout["labels"].items()}
+    values = convertYearCells(rows, layout["yearIndices"])
+    return packChunk(layout, values, labels)
+
+def packChunk(layout: Dict[str, Any], values: np.ndarray, labels: Dict[str, List[str]]) -> GDPDataset:
+    """Builds a chunk's dataset; files with an Indicator Code column also keep it per row."""
+    chunk = GDPDataset(layout["years"], values, labels["country"], labels["code"], labels["region"])
+    if layout["labels"]["indicatorCode"][0] is not None:
+        chunk.rowIndicators = internStrings(labels["indicatorCode"])
+        names = labels["indicatorName"] if layout["labels"]["indicatorName"][0] is not None else labels["indicatorCode"]
+        chunk.rowIndicatorNames = internStrings(names)
+    return chunk
+
+def iterChunks(filename: str, chunkRows: int) -> Iterator[GDPDataset]:
+    with open(filename, mode='r', encoding='utf-8', newline='') as f:
+        layout = classifyHeader(next(csv.reader([f.readline()]), []))
+
+        while True:
+            lines = list(islice(f, chunkRows))
+            if not lines:
+                return
+            with instrument.span("loader.chunk"):
+                chunk = convertLinesFast(lines, layout)
+                if chunk is None:
+                    instrument.count("loader.csv_fallback_chunks")
+                    chunk = convertChunk(list(csv.reader(lines)), layout)
+            instrument.count("loader.rows_parsed", len(chunk))
+            if len(chunk):
+                yield chunk
+
+def parseColumnar(filename: str) -> GDPDataset:
+    """Fast path: header classified once, year columns converted in bulk per chunk of lines."""
+    return GDPDataset.concat(list(iterChunks(filename, PARSE_CHUNK_ROWS)))
+
+@instrument.timed("loader.cleanRows")
+def parseDataset(filename: str) -> GDPDataset:
+    """Reference path through csv.DictReader and cleanRow, one dict per row."""
+    with open(filename, mode='r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        years = sorted(int(h) for h in (reader.fieldnames or []) if isYearColumn(h))
+
+        dataset = GDPDataset.fromRecords(map(cleanRow, reader), years)
+        instrument.count("loader.rows_cleaned", len(dataset))
+        return dataset
+
+def peekIndicator(filename: str):
+    """Reads the (Indicator Code, Indicator Name) of the first data row, or (None, None)."""
+    with open(filename, mode='r', encoding='utf-8', newline='') as f:
+        reader = csv.DictReader(f)
+        row = next(reader, None) or {}
+        return row.get("Indicator Code"), row.get("Indicator Name")
+
+@instrument.timed("loader.loadDataset")
+def loadDataset(filename: str, useCache: bool = True, fast: bool = True) -> GDPDataset:
+    """Memory-maps the binary snapshot when it is fresh, otherwise parses and rewrites it."""
+    try:
+        with instrument.span("loader.snapshot"):
+            dataset = snapshot.loadSnapshot(filename) if useCache else None
+        instrument.count("loader.snapshot_hits" if dataset is not None else "loader.snapshot_misses")
+
+        if dataset is None:
+            signature = snapshot.sourceSignature(filename) if useCache else None
+            with instrument.span("loader.parse"):
+                dataset = parseColumnar(filename) if fast else parseDataset(filename)
+            if useCache:
+                try:
+                    with instrument.span("loader.saveSnapshot"):
+                        snapshot.saveSnapshot(dataset, filename, signature)
+                except OSError as e:
+                    print(f"Warning: could not write dataset cache: {e}")
+
+        dataset.source = os.path.abspath(filename)
+        dataset.indicatorCode, dataset.indicatorName = peekIndicator(filename)
+
+        # Classify aggregate rows, then build lookup tables, range prefix sums and the region rollup once, up front
+        with instrument.span("loader.indexes"):
+            dataset.aggregate
+            dataset.index
+            dataset.ranges
+            dataset.rollup
+        return dataset
 
-            cleanedData = list(map(cleanRow, reader))
-            return cleanedData
-        
     except FileNotFoundError:
         print(f"Error: File '{filename}' not found.")
-        return []
+        return GDPDataset.empty()
     except Exception as e:
         print(f"Error reading file: {e}")
-        return []
+        return GDPDataset.empty()
+
+def iterBatches(filename: str, batchSize: int = 10000) -> Iterator[GDPDataset]:
+    """
+    Streams the CSV as fixed-size GDPDataset batches so the full table is never
+    held. Batches of files with an Indicator Code column (World Bank bulk
+    exports) carry it per row as rowIndicators.
+    """
+    return iterChunks(filename, batchSize)
+
+@instrument.timed("loader.loadData")
+def loadData(filename: str) -> Sequence[Dict[str, Any]]:
+    """Legacy list-of-dicts shape, served as a lazy view over the columnar store."""
+    return loadDataset(filename).records()
 
 if __name__ == "__main__":
 
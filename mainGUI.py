@@ -1,12 +1,39 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import json
+import instrument
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
 import loader
-import processor
+import planner
+import registry
+import resultcache
+from planner import validateConfig
 import visualizer
+import watcher
 
-# Load data once
-DATA = loader.loadData("gdp_with_continent_filled.csv")
+# Data is loaded once, in the background, so the window paints immediately
+DATA_FILE = "gdp_with_continent_filled.csv"
+DATA = None
+DATA_POLL_MS = 50
+
+# The CSV is polled for changes; only the rows that changed are patched into DATA
+WATCH_INTERVAL_S = 2.0
+RELOAD_RETRY_MS = 500
+
+# Memoized results for repeated manual queries (invalidated when DATA is reloaded)
+RESULT_CACHE_SIZE = 256
+RESULT_CACHE = resultcache.ResultCache(maxSize=RESULT_CACHE_SIZE)
+
+# Analyses run on a worker pool; results are handed back to the Tk thread by polling
+WORKER_COUNT = 4
+BATCH_CHUNK_SIZE = 25
+RESULT_POLL_MS = 50
+
+# Most recent charts that can be re-shown from the Dashboard panel
+CHART_HISTORY_SIZE = 200
 
 # Allowed year range
 MIN_YEAR = 1960
@@ -20,49 +47,54 @@ BUTTON_BG = "#333333"       # Slightly lighter grey for buttons
 BUTTON_ACTIVE = "#444444"   # Hover state
 ERROR_COLOR = "#cf6679"     # Muted Red for Quit/Errors
 
-# --- Helper: Validation Logic ---
-def validateConfig(config):
-    """Validates the structure of the uploaded JSON configuration."""
-    if "analyses" not in config:
-        print("Error: Config missing 'analyses' list.")
-        return False
-    
-    for i, item in enumerate(config["analyses"]):
-        if "type" not in item:
-            print(f"Error: Analysis item #{i+1} missing 'type'.")
-            return False
-        
-        if item["type"] == "region":
-            if not all(k in item for k in ("region", "year", "operation")):
-                print(f"Error: Region analysis #{i+1} missing required fields.")
-                return False
-        elif item["type"] == "country_trend":
-            if not all(k in item for k in ("country", "start_year", "end_year")):
-                print(f"Error: Country analysis #{i+1} missing required fields.")
-                return False
-                
-    return True
+# --- Helper: Background Loading ---
+def load_in_background(filename):
+    """Starts loading the dataset on a daemon thread and returns a Future for it."""
+    future = Future()
+
+    def work():
+        try:
+            future.set_result(loader.loadDataset(filename))
+        except Exception as e:
+            future.set_exception(e)
+
+    threading.Thread(target=work, name="dataset-loader", daemon=True).start()
+    return future
 
 # --- GUI ---
 class GDPDashboardGUI:
     def __init__(self, root):
         self.root = root
         self.root.title("GDP Analysis Dashboard")
-        self.root.geometry("500x650") 
+        self.root.geometry("1300x720") 
         self.root.resizable(True, True)
         
         # Apply the Dark Theme
         self.setup_dark_theme()
 
+        # Controls on the left, embedded chart on the right
+        controls = ttk.Frame(root)
+        controls.pack(side="left", fill="y")
+
         # --- Section 1: JSON Import ---
-        import_frame = ttk.LabelFrame(root, text="Batch Processing (JSON)")
+        import_frame = ttk.LabelFrame(controls, text="Batch Processing (JSON)")
         import_frame.pack(fill="x", padx=15, pady=15)
         
         ttk.Label(import_frame, text="Load a config.json file to run multiple analyses:").pack(pady=5)
-        ttk.Button(import_frame, text="Import Config File", command=self.import_json_config).pack(pady=10)
+        batch_buttons = ttk.Frame(import_frame)
+        batch_buttons.pack(pady=(10, 5))
+        self.import_btn = ttk.Button(batch_buttons, text="Import Config File", command=self.import_json_config)
+        self.import_btn.pack(side="left", padx=5)
+        self.cancel_btn = ttk.Button(batch_buttons, text="Cancel", command=self.cancel_batch, style="Quit.TButton", state="disabled")
+        self.cancel_btn.pack(side="left", padx=5)
+
+        self.progress = ttk.Progressbar(import_frame, mode="determinate")
+        self.progress.pack(fill="x", padx=10, pady=5)
+        self.progress_label = ttk.Label(import_frame, text="")
+        self.progress_label.pack(pady=(0, 5))
 
         # --- Section 2: Manual Interactive Mode ---
-        manual_frame = ttk.LabelFrame(root, text="Manual Analysis")
+        manual_frame = ttk.LabelFrame(controls, text="Manual Analysis")
         manual_frame.pack(fill="both", expand=True, padx=15, pady=10)
 
         ttk.Label(manual_frame, text="Select Analysis Type:").pack(pady=5)
@@ -74,10 +106,9 @@ class GDPDashboardGUI:
         # Region / Country
         self.region_label = ttk.Label(manual_frame, text="Region:")
         self.region_label.pack()
-        regions = sorted(set(d['region'] for d in DATA))
-        self.region_combo = ttk.Combobox(manual_frame, values=regions, state="readonly")
+        self.region_combo = ttk.Combobox(manual_frame, values=[], state="disabled")
+        self.region_combo.set("Loading data...")
         self.region_combo.pack()
-        self.region_combo.current(0)
 
         self.country_label = ttk.Label(manual_frame, text="Country:")
         self.country_entry = ttk.Entry(manual_frame)
@@ -104,7 +135,7 @@ class GDPDashboardGUI:
         self.graph_combo.current(0)
 
         # Action Buttons
-        button_frame = ttk.Frame(root)
+        button_frame = ttk.Frame(controls)
         button_frame.pack(pady=20)
 
         # Generate Button (Cyan Accent)
@@ -115,8 +146,33 @@ class GDPDashboardGUI:
         quit_btn = ttk.Button(button_frame, text="Quit Application", command=root.quit, style="Quit.TButton")
         quit_btn.pack(side="left", padx=10)
 
+        # --- Section 3: Embedded Dashboard ---
+        # One figure is reused for every chart; matplotlib itself loads on first use.
+        self.chart_frame = ttk.LabelFrame(root, text="Dashboard")
+        self.chart_frame.pack(side="left", fill="both", expand=True, padx=15, pady=15)
+        ttk.Label(self.chart_frame, text="Chart:").pack(anchor="w", padx=5)
+        self.history_combo = ttk.Combobox(self.chart_frame, values=[], state="readonly")
+        self.history_combo.pack(fill="x", padx=5, pady=(0, 5))
+        self.history_combo.bind("<<ComboboxSelected>>", self.show_history_chart)
+        self.chart_history = []
+        self.dashboard = None
+        self.canvas = None
+        self.drag_start = None
+
         self.toggle_fields()  # initialize
 
+        # Region list is filled in once the background load finishes
+        self.data_future = load_in_background(DATA_FILE)
+        self.root.after(DATA_POLL_MS, self.poll_data)
+
+        # Worker pool for analyses; finished futures are queued for the Tk thread
+        self.executor = ThreadPoolExecutor(max_workers=WORKER_COUNT, thread_name_prefix="analysis")
+        self.done_queue = queue.Queue()
+        self.in_flight = set()
+        self.batch = None
+        self.file_watcher = None
+        self.root.after(RESULT_POLL_MS, self.poll_results)
+
     def setup_dark_theme(self):
         """Configures the Tkinter styling engine for a Dark Material look."""
         self.root.configure(bg=BG_COLOR)
@@ -170,6 +226,73 @@ class GDPDashboardGUI:
         style.map("TCombobox", fieldbackground=[("readonly", BUTTON_BG)], selectbackground=[("readonly", BUTTON_BG)])
 
 
+    def poll_data(self):
+        """Runs on the Tk thread; hands the loaded dataset to the widgets when ready."""
+        global DATA
+        if not self.data_future.done():
+            self.root.after(DATA_POLL_MS, self.poll_data)
+            return
+
+        try:
+            DATA = self.data_future.result()
+        except Exception as e:
+            self.region_combo.set("Load failed")
+            messagebox.showerror("Data Error", f"Could not load dataset:\n{e}")
+            return
+
+        self.refresh_regions()
+        self.file_watcher = watcher.FileWatcher(DATA_FILE, self.source_changed, WATCH_INTERVAL_S).start()
+
+    def refresh_regions(self):
+        regions = DATA.index.regionNames
+        current = self.region_combo.get()
+        self.region_combo.configure(values=regions, state="readonly")
+        if current in regions:
+            self.region_combo.set(current)
+        elif regions:
+            self.region_combo.current(0)
+        else:
+            self.region_combo.set("")
+
+    # --- Incremental Reload ---
+
+    def source_changed(self, path):
+        """Runs on the watcher thread: re-read and diff on the pool, patch on the Tk thread."""
+        self.submit(watcher.reloadChanges, DATA, path, on_done=partial(self.apply_reload, DATA.version))
+
+    def apply_reload(self, version, future):
+        try:
+            new, diff = future.result()
+        except Exception as e:
+            print(f"Warning: could not reload '{DATA_FILE}': {e}")
+            return
+
+        # The diff is only valid against the version it was computed from; re-read if DATA moved on
+        if DATA.version != version:
+            self.source_changed(DATA_FILE)
+            return
+
+        # Workers read DATA while they run (including chunks of a cancelled batch that
+        # had already started), so patch only once nothing is in flight
+        if self.batch is not None or self.in_flight:
+            self.root.after(RELOAD_RETRY_MS, partial(self.apply_reload, version, future))
+            return
+
+        old_version = DATA.version
+        patch = watcher.applyPatch(DATA, new, diff)
+        if not patch["codes"]:
+            return
+        dropped = RESULT_CACHE.rebase(DATA, old_version, patch)
+        if patch["structural"]:
+            self.refresh_regions()
+        print(f"Reloaded {DATA_FILE}: {len(patch['codes'])} entities changed, {dropped} cached results invalidated.")
+
+    def data_ready(self):
+        if DATA is None:
+            messagebox.showinfo("Loading", "The dataset is still loading. Please try again in a moment.")
+            return False
+        return True
+
     def toggle_fields(self, event=None):
         if self.analysis_type.get() == "Region":
             self.region_label.pack()
@@ -183,6 +306,7 @@ class GDPDashboardGUI:
             self.country_entry.pack()
 
     def import_json_config(self):
+        if not self.data_ready(): return
         filename = filedialog.askopenfilename(title="Select Configuration File", filetypes=(("JSON Files", "*.json"), ("All Files", "*.*")))
         if not filename: return
 
@@ -195,33 +319,206 @@ class GDPDashboardGUI:
         if not validateConfig(config):
             messagebox.showerror("Config Error", "Invalid configuration file. Check console.")
             return
+        instrument.configure(config)
+
+        if self.batch is not None:
+            messagebox.showwarning("Busy", "A batch is already running. Cancel it or wait for it to finish.")
+            return
+
+        # Extra indicator files / derived ratios load lazily on the workers
+        data = DATA
+        if config.get("datasets"):
+            try:
+                data = registry.registryFromConfig(config, DATA)
+            except Exception as e:
+                messagebox.showerror("Config Error", f"Could not register datasets:\n{e}")
+                return
 
         print(f"\n--- Batch Processing: {filename} ---")
 
-        for i, analysis in enumerate(config["analyses"]):
-            print(f"\n--- Analysis #{i+1}: {analysis['type'].upper()} ---")
-            
-            if analysis["type"] == "region":
-                result = processor.processAnalysis(DATA, analysis)
-                result["graph"] = analysis.get("graph", "bar")
-                print(f"Region: {analysis['region']}")
-                print(f"Operation: {analysis['operation'].capitalize()}")
-                print(f"Result: ${result['resultValue']:,.2f}")
-                visualizer.plotDashboard(result)
-
-            elif analysis["type"] == "country_trend":
-                result = processor.processCountryTrend(DATA, analysis["country"], analysis["start_year"], analysis["end_year"])
-                if result:
-                    stats = result.get("stats", {})
-                    print(f"Country: {analysis['country']}")
-                    print(f"Average GDP ({analysis['start_year']}-{analysis['end_year']}): ${stats.get('average', 0):,.2f}")
-                    visualizer.plotDashboard(result)
-                else:
-                    print(f"Error: Country '{analysis['country']}' not found.")
+        # Each chunk is planned and executed together (sharing the per-year scans)
+        # on the worker pool; charts appear as their chunk finishes.
+        analyses = config["analyses"]
+        batch = {"total": len(analyses), "done": 0, "futures": [], "cancelled": False}
+        self.batch = batch
+        self.progress.configure(maximum=max(1, batch["total"]), value=0)
+        self.progress_label.configure(text=f"0 / {batch['total']} analyses")
+        self.import_btn.configure(state="disabled")
+        self.cancel_btn.configure(state="normal")
+
+        for start in range(0, len(analyses), BATCH_CHUNK_SIZE):
+            chunk = analyses[start:start + BATCH_CHUNK_SIZE]
+            future = self.submit(planner.runAnalyses, data, chunk,
+                                 on_done=partial(self.show_batch_chunk, batch, start, chunk))
+            batch["futures"].append(future)
+
+        if not analyses:
+            self.finish_batch(batch)
+
+    def show_batch_chunk(self, batch, start, chunk, future):
+        if batch["cancelled"]:
+            return
+        try:
+            results = future.result()
+        except Exception as e:
+            results = [None] * len(chunk)
+            print(f"Error: analyses #{start+1}-#{start+len(chunk)} failed: {e}")
+
+        for i, (analysis, result) in enumerate(zip(chunk, results), start):
+            try:
+                self.report_analysis(i, analysis, result)
+            except Exception as e:
+                print(f"Error: could not show analysis #{i+1}: {e}")
+
+        batch["done"] += len(chunk)
+        self.progress.configure(value=batch["done"])
+        self.progress_label.configure(text=f"{batch['done']} / {batch['total']} analyses")
+        if batch["done"] >= batch["total"]:
+            self.finish_batch(batch)
+
+    def report_analysis(self, i, analysis, result):
+        print(f"\n--- Analysis #{i+1}: {analysis['type'].upper()} ---")
         
-        messagebox.showinfo("Success", "Batch processing complete. Check console for stats.")
+        if analysis["type"] == "region":
+            if result is None:
+                print(f"Error: no result for region '{analysis['region']}'.")
+                return
+            result["graph"] = analysis.get("graph", "bar")
+            print(f"Region: {analysis['region']}")
+            print(f"Operation: {analysis['operation'].capitalize()}")
+            print(f"Result: ${result['resultValue']:,.2f} ({result['count']} countries with data)")
+            self.show_chart(result)
+
+        elif analysis["type"] == "country_trend":
+            if result:
+                stats = result.get("stats", {})
+                print(f"Country: {analysis['country']}")
+                print(f"Average GDP ({analysis['start_year']}-{analysis['end_year']}): ${stats.get('average', 0):,.2f}")
+                self.show_chart(result)
+            else:
+                print(f"Error: Country '{analysis['country']}' not found.")
+
+        elif analysis["type"] == "ranking":
+            if result is None:
+                print(f"Error: no ranking result for {analysis.get('year')}.")
+                return
+            result["graph"] = analysis.get("graph", "bar")
+            print(result["title"])
+            print(f"Selected total: ${result['resultValue']:,.2f} ({result['others']['count']} more countries under Others)")
+            self.show_chart(result)
+
+        elif analysis["type"] == "growth":
+            if result:
+                result["graph"] = analysis.get("graph", result.get("graph", "bar"))
+                print(result["title"])
+                if "stats" in result:
+                    print(f"CAGR: {result['stats']['cagr']:,.2f}%")
+                else:
+                    print(f"Ranked {result['count']} countries with data")
+                self.show_chart(result)
+            else:
+                print(f"Error: Country '{analysis.get('country')}' not found.")
+
+    def finish_batch(self, batch):
+        self.batch = None
+        self.import_btn.configure(state="normal")
+        self.cancel_btn.configure(state="disabled")
+        if batch["cancelled"]:
+            self.progress_label.configure(text=f"Cancelled after {batch['done']} / {batch['total']} analyses")
+        else:
+            messagebox.showinfo("Success", "Batch processing complete. Check console for stats.")
+
+    def cancel_batch(self):
+        batch = self.batch
+        if batch is None:
+            return
+        batch["cancelled"] = True
+        for future in batch["futures"]:
+            future.cancel()
+        print("\n--- Batch cancelled ---")
+        self.finish_batch(batch)
+
+    # --- Embedded Chart ---
+
+    def show_chart(self, result):
+        """Draws a result on the embedded canvas and remembers it in the chart list."""
+        if self.dashboard is None:
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            self.dashboard = visualizer.DashboardCanvas()
+            self.canvas = FigureCanvasTkAgg(self.dashboard.figure, master=self.chart_frame)
+            self.canvas.get_tk_widget().pack(fill="both", expand=True)
+            self.canvas.mpl_connect("draw_event", lambda event: self.dashboard.capture_background(self.canvas))
+            self.canvas.mpl_connect("button_press_event", self.start_range)
+            self.canvas.mpl_connect("motion_notify_event", self.drag_range)
+            self.canvas.mpl_connect("button_release_event", self.end_range)
+
+        self.chart_history.append(result)
+        del self.chart_history[:-CHART_HISTORY_SIZE]
+        titles = [f"{i+1}. {r['title']}" for i, r in enumerate(self.chart_history)]
+        self.history_combo.configure(values=titles)
+        self.history_combo.current(len(titles) - 1)
+        self.draw_chart(result)
+
+    def show_history_chart(self, event=None):
+        index = self.history_combo.current()
+        if 0 <= index < len(self.chart_history):
+            self.draw_chart(self.chart_history[index])
+
+    def draw_chart(self, result):
+        if not self.dashboard.render(result):
+            print("No data available.")
+        self.canvas.draw_idle()
+
+    # --- Range Highlight ---
+
+    def start_range(self, event):
+        if event.inaxes is self.dashboard.ax and event.xdata is not None:
+            self.drag_start = event.xdata
+
+    def drag_range(self, event):
+        if self.drag_start is not None and event.inaxes is self.dashboard.ax and event.xdata is not None:
+            self.dashboard.highlight_range(self.canvas, self.drag_start, event.xdata)
+
+    def end_range(self, event):
+        if self.drag_start is not None and event.xdata == self.drag_start:
+            self.dashboard.clear_range(self.canvas)
+        self.drag_start = None
+
+    def close(self):
+        if self.file_watcher is not None:
+            self.file_watcher.stop()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.dashboard is not None:
+            self.dashboard.close()
+
+    # --- Worker Pool Plumbing ---
+
+    def submit(self, func, *args, on_done):
+        """Runs func on the worker pool; on_done(future) is later called on the Tk thread."""
+        future = self.executor.submit(func, *args)
+        self.in_flight.add(future)
+        future.add_done_callback(lambda f: self.done_queue.put((f, on_done)))
+        return future
+
+    def poll_results(self):
+        try:
+            while True:
+                future, on_done = self.done_queue.get_nowait()
+                self.in_flight.discard(future)
+                if future.cancelled():
+                    continue
+                # One failing callback must not stop the results that follow it
+                try:
+                    on_done(future)
+                except Exception as e:
+                    print(f"Error: could not handle a finished task: {e}")
+        except queue.Empty:
+            pass
+        finally:
+            self.root.after(RESULT_POLL_MS, self.poll_results)
 
     def generate_graph(self):
+        if not self.data_ready(): return
         try:
             graph_type = self.graph_combo.get()
             if graph_type not in ["bar", "pie", "line"]:
@@ -249,14 +546,8 @@ class GDPDashboardGUI:
                     return
 
                 config = {"region": region, "year": year, "operation": operation}
-                result = processor.processAnalysis(DATA, config)
-                result["graph"] = graph_type
-                
-                print(f"Region: {region}")
-                print(f"Operation: {operation.capitalize()}")
-                print(f"Result: ${result['resultValue']:,.2f}")
-                
-                visualizer.plotDashboard(result)
+                self.submit(RESULT_CACHE.analysis, DATA, config,
+                            on_done=partial(self.show_region_result, config, graph_type))
 
             else:
                 country = self.country_entry.get().strip()
@@ -286,28 +577,53 @@ class GDPDashboardGUI:
                     messagebox.showerror("Invalid Year Range", "Start Year cannot be after End Year.")
                     return
 
-                countries = [d['country'] for d in DATA]
-                found_country = next((c for c in countries if c.lower() == country.lower()), None)
+                row = DATA.index.findCountry(country)
                 
-                if not found_country:
+                if row is None:
                     messagebox.showerror("Invalid Country", f"Country '{country}' not found.")
                     return
+                found_country = DATA.countries[row]
 
-                result = processor.processCountryTrend(DATA, found_country, start_year, end_year)
-                if result:
-                    result["graph"] = graph_type
-                    stats = result.get("stats", {})
-                    print(f"Country: {found_country}")
-                    print(f"Average GDP ({start_year}-{end_year}): ${stats.get('average', 0):,.2f}")
-                    visualizer.plotDashboard(result)
-                else:
-                    messagebox.showerror("Error", f"No data available for '{country}' in the selected years.")
+                self.submit(RESULT_CACHE.countryTrend, DATA, found_country, start_year, end_year,
+                            on_done=partial(self.show_trend_result, found_country, start_year, end_year, graph_type))
+
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+
+    def show_region_result(self, config, graph_type, future):
+        try:
+            result = future.result()
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+            return
+
+        result["graph"] = graph_type
+        
+        print(f"Region: {config['region']}")
+        print(f"Operation: {config['operation'].capitalize()}")
+        print(f"Result: ${result['resultValue']:,.2f} ({result['count']} countries with data)")
+        
+        self.show_chart(result)
 
+    def show_trend_result(self, country, start_year, end_year, graph_type, future):
+        try:
+            result = future.result()
         except Exception as e:
             messagebox.showerror("Error", str(e))
+            return
+
+        if result:
+            result["graph"] = graph_type
+            stats = result.get("stats", {})
+            print(f"Country: {country}")
+            print(f"Average GDP ({start_year}-{end_year}): ${stats.get('average', 0):,.2f}")
+            self.show_chart(result)
+        else:
+            messagebox.showerror("Error", f"No data available for '{country}' in the selected years.")
 
 if __name__ == "__main__":
     root = tk.Tk()
     app = GDPDashboardGUI(root)
     root.mainloop()
+    app.close()
 
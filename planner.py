@@ -0,0 +1,164 @@
+from collections import defaultdict
+
+import growth
+import instrument
+import processor
+from dataset import asDataset
+
+# --- Helper Functions ---
+
+def isCount(value):
+    """True for an int >= 1 (bools excluded), as needed for top/bottom/window."""
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 1
+
+def validateConfig(config):
+    """Validates the structure of the uploaded JSON configuration."""
+    if not isinstance(config.get("analyses"), list):
+        print("Error: Config missing 'analyses' list.")
+        return False
+    
+    for i, item in enumerate(config["analyses"]):
+        if not isinstance(item, dict):
+            print(f"Error: Analysis item #{i+1} must be an object.")
+            return False
+        if "type" not in item:
+            print(f"Error: Analysis item #{i+1} missing 'type'.")
+            return False
+        
+        if item["type"] == "region":
+            if not all(k in item for k in ("region", "year", "operation")):
+                print(f"Error: Region analysis #{i+1} missing required fields.")
+                return False
+        elif item["type"] == "country_trend":
+            if not all(k in item for k in ("country", "start_year", "end_year")):
+                print(f"Error: Country analysis #{i+1} missing required fields.")
+                return False
+        elif item["type"] == "ranking":
+            if "year" not in item:
+                print(f"Error: Ranking analysis #{i+1} missing required fields.")
+                return False
+            if "percentile" in item:
+                band = item["percentile"]
+                numeric = isinstance(band, list) and len(band) == 2 and all(
+                        isinstance(b, (int, float)) and not isinstance(b, bool) for b in band)
+                if not (numeric and 0 <= band[0] <= band[1] <= 100):
+                    print(f"Error: Ranking analysis #{i+1} 'percentile' must be [lower, upper] within 0-100.")
+                    return False
+            # processRanking uses "bottom" over "top" when both are given
+            elif not isCount(item.get("bottom", item.get("top", 1))):
+                print(f"Error: Ranking analysis #{i+1} 'top' or 'bottom' must be a whole number of at least 1.")
+                return False
+        elif item["type"] == "growth":
+            if not all(k in item for k in ("start_year", "end_year")):
+                print(f"Error: Growth analysis #{i+1} missing required fields.")
+                return False
+            if item.get("metric", "cagr") not in growth.GROWTH_METRICS:
+                print(f"Error: Growth analysis #{i+1} has unknown metric (use one of {', '.join(growth.GROWTH_METRICS)}).")
+                return False
+            if not (isCount(item.get("window", 1)) and isCount(item.get("top", 1))):
+                print(f"Error: Growth analysis #{i+1} 'window' and 'top' must be whole numbers of at least 1.")
+                return False
+            if item.get("graph") == "pie":
+                print(f"Error: Growth analysis #{i+1} cannot use a pie chart (growth rates can be negative); use bar or line.")
+                return False
+
+    for i, entry in enumerate(config.get("datasets", [])):
+        if "path" not in entry and not all(k in entry for k in ("indicator", "numerator", "denominator")):
+            print(f"Error: Dataset entry #{i+1} needs a 'path' or 'indicator', 'numerator' and 'denominator'.")
+            return False
+                
+    return True
+
+def planAnalyses(analyses):
+    """
+    Groups region analyses by (indicator, year), then region, so every operation
+    on a (region, year) pair shares the same slice, and growth rankings by their
+    (indicator, metric, start_year, end_year, window) so each metric is computed
+    for every entity once. Returns (regionGroups, directJobs, growthGroups):
+    {(indicator, year): {region: [indices]}}, [indices of analyses run on
+    their own: country_trend, ranking and per-country growth] and
+    {growth key: [indices]}; indicator is None for the default series.
+    """
+    regionGroups = defaultdict(lambda: defaultdict(list))
+    directJobs = []
+    growthGroups = defaultdict(list)
+    for i, analysis in enumerate(analyses):
+        kind = analysis.get("type", "region")
+        if kind == "region":
+            regionGroups[(analysis.get("indicator"), analysis.get("year"))][analysis.get("region")].append(i)
+        elif kind in ("country_trend", "ranking") or (kind == "growth" and analysis.get("country")):
+            directJobs.append(i)
+        elif kind == "growth":
+            key = (analysis.get("indicator"), analysis.get("metric", "cagr"), analysis.get("start_year"),
+                   analysis.get("end_year"), analysis.get("window", growth.DEFAULT_WINDOW))
+            growthGroups[key].append(i)
+    return regionGroups, directJobs, growthGroups
+
+def knownIndicator(data, indicator):
+    """False when data is a registry that cannot load indicator (None always means the default)."""
+    if indicator is None or not hasattr(data, "datasetFor"):
+        return True
+    if data.canLoad(indicator):
+        return True
+    print(f"Error: indicator '{indicator}' (or one of its ratio inputs) is not registered; list it under \"datasets\" in the config.")
+    return False
+
+# --- Main Functions ---
+
+@instrument.timed("planner.runAnalyses")
+def runAnalyses(data, analyses):
+    """
+    Executes every entry of a config's "analyses" list, reading statistics from
+    each dataset's region rollup, and returns results in input order, shaped like
+    processAnalysis / processCountryTrend (None for unknown countries,
+    indicators or analysis types). data may be a registry.DatasetRegistry for multi-indicator configs.
+    """
+    if not hasattr(data, "datasetFor"):
+        data = asDataset(data)  # convert legacy records once, not per group
+    regionGroups, directJobs, growthGroups = planAnalyses(analyses)
+    results = [None] * len(analyses)
+
+    for (indicator, year), regions in regionGroups.items():
+        if not knownIndicator(data, indicator):
+            continue
+        dataset = asDataset(data, indicator)
+        label = processor.seriesLabel(dataset, indicator)
+
+        for region, jobs in regions.items():
+            rows, gdpValues = processor.regionYearSlice(dataset, region, year)
+            labels = dataset.countries[rows].tolist()
+            values = gdpValues.tolist()
+
+            for i in jobs:
+                operation = analyses[i].get('operation', 'average')
+                resultStat = dataset.rollup.stat(region, year, operation)
+                results[i] = {
+                    "title": f"{operation.capitalize()} {label} of {region} in {year}",
+                    "resultValue": resultStat,
+                    "count": len(labels),
+                    "plotData": {"labels": list(labels), "values": list(values)},
+                    "year": year,
+                    "region": region
+                }
+
+    for (indicator, metric, startYear, endYear, window), jobs in growthGroups.items():
+        if not knownIndicator(data, indicator):
+            continue
+        scores = growth.metricScores(asDataset(data, indicator), metric, startYear, endYear, window)
+        for i in jobs:
+            results[i] = processor.processGrowth(data, analyses[i], scores)
+
+    for i in directJobs:
+        analysis = analyses[i]
+        if not knownIndicator(data, analysis.get("indicator")):
+            continue
+        if analysis["type"] == "growth":
+            results[i] = processor.processGrowth(data, analysis)
+            continue
+        if analysis["type"] == "ranking":
+            results[i] = processor.processRanking(data, analysis)
+            continue
+        results[i] = processor.processCountryTrend(data, analysis["country"], analysis["start_year"], analysis["end_year"],
+                                                   analysis.get("indicator"))
+
+    return results
@@ -1,63 +1,361 @@
-import statistics
+import numpy as np
+
+import growth
+import instrument
+import ranking
+from dataset import GDPDataset, asDataset, isAggregate
 
 # --- Helper Functions ---
 
 def filterByRegion(data, regionName):
-    return list(filter(lambda country: country['region'] == regionName, data))
+    dataset = getattr(data, "dataset", data)
+    if isinstance(dataset, GDPDataset):
+        return [dataset.record(i) for i in dataset.index.rowsForRegion(regionName)]
+    return list(filter(lambda country: country['region'] == regionName and not isAggregate(country['code'], regionName), data))
 
 def getYearValues(data, year):
+    dataset = getattr(data, "dataset", data)
+    if isinstance(dataset, GDPDataset):
+        col = dataset.yearColumn(year)
+        if col is None:
+            return []
+        return dataset.values[dataset.mask[:, col], col].tolist()
     return [country['gdp'][year] for country in data if year in country['gdp']]
 
+def validValues(values):
+    """Drops missing (NaN) observations so every statistic only sees real data."""
+    values = np.asarray(values, dtype=np.float64)
+    return values[~np.isnan(values)]
+
 def calculateStats(values, operationName):
-    if not values: return 0.0
+    values = validValues(values)
+    if len(values) == 0: return 0.0
     operations = {
-        "average": statistics.mean,
-        "sum": sum,
-        "max": max,
-        "min": min
+        "average": np.mean,
+        "sum": np.sum,
+        "max": np.max,
+        "min": np.min
     }
     func = operations.get(operationName.lower())
-    return func(values) if func else 0.0
+    return float(func(values)) if func else 0.0
+
+class RunningStats:
+    """One-pass accumulator for the calculateStats operations."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.minimum = np.inf
+        self.maximum = -np.inf
+
+    def update(self, values):
+        values = validValues(values)
+        if len(values) == 0: return
+        self.count += len(values)
+        self.total += float(np.sum(values))
+        self.minimum = min(self.minimum, float(np.min(values)))
+        self.maximum = max(self.maximum, float(np.max(values)))
+
+    def result(self, operationName):
+        if self.count == 0: return 0.0
+        operations = {
+            "average": lambda: self.total / self.count,
+            "sum": lambda: self.total,
+            "max": lambda: self.maximum,
+            "min": lambda: self.minimum
+        }
+        func = operations.get(operationName.lower())
+        return func() if func else 0.0
+
+def regionYearSlice(dataset, regionName, year):
+    """Row ids and values of a region's sovereign entities that have data for the given year."""
+    rows = dataset.regionRows(regionName)
+    instrument.count("processor.rows_scanned", len(rows))
+    col = dataset.yearColumn(year)
+    if col is None:
+        return rows[:0], np.empty(0)
+
+    rows = rows[dataset.mask[rows, col]]
+    return rows, dataset.values[rows, col]
+
+def findCountryRow(dataset, countryName):
+    return dataset.index.findCountry(countryName)
+
+def seriesLabel(dataset, indicator):
+    """Name used in titles: plain "GDP" unless the config picked a specific indicator."""
+    if indicator is None:
+        return "GDP"
+    return dataset.indicatorName or indicator
 
 # --- Main Functions ---
 
+@instrument.timed("processor.processAnalysis")
 def processAnalysis(data, config):
     targetRegion = config.get('region')
     targetYear = config.get('year')
     operation = config.get('operation', 'average')
+    indicator = config.get('indicator')
 
-    regionData = filterByRegion(data, targetRegion)
-    gdpValues = getYearValues(regionData, targetYear)
-    countryNames = [c['country'] for c in regionData if targetYear in c['gdp']]
-    
-    resultStat = calculateStats(gdpValues, operation)
+    dataset = asDataset(data, indicator)
+    rows, gdpValues = regionYearSlice(dataset, targetRegion, targetYear)
+    countryNames = dataset.countries[rows].tolist()
+
+    resultStat = dataset.rollup.stat(targetRegion, targetYear, operation)
 
     return {
-        "title": f"{operation.capitalize()} GDP of {targetRegion} in {targetYear}",
+        "title": f"{operation.capitalize()} {seriesLabel(dataset, indicator)} of {targetRegion} in {targetYear}",
         "resultValue": resultStat,
-        "plotData": {"labels": countryNames, "values": gdpValues},
+        "count": len(gdpValues),
+        "plotData": {"labels": countryNames, "values": gdpValues.tolist()},
         "year": targetYear,
         "region": targetRegion
     }
 
-def processCountryTrend(data, countryName, startYear, endYear):
-    countryObj = next(filter(lambda c: c['country'].lower() == countryName.lower(), data), None)
-    
-    if not countryObj:
+@instrument.timed("processor.processCountryTrend")
+def processCountryTrend(data, countryName, startYear, endYear, indicator=None):
+    dataset = asDataset(data, indicator)
+    row = findCountryRow(dataset, countryName)
+
+    if row is None:
         return None
 
-    years = [y for y in range(startYear, endYear + 1) if y in countryObj['gdp']]
-    values = [countryObj['gdp'][y] for y in years]
+    ranges = dataset.ranges
+    lo, hi = ranges.columnSpan(startYear, endYear)
+    valid = dataset.mask[row, lo:hi]
+    instrument.count("processor.cells_scanned", hi - lo)
+    years = dataset.years[lo:hi][valid]
+    values = dataset.values[row, lo:hi][valid]
 
-    avg_val = statistics.mean(values) if values else 0.0
-    total_val = sum(values)
+    avg_val = float(ranges.average(row, startYear, endYear))
+    total_val = float(ranges.total(row, startYear, endYear))
 
     return {
-        "title": f"GDP Trend of {countryName} ({startYear}-{endYear})",
-        "plotData": { "labels": years, "values": values },
+        "title": f"{seriesLabel(dataset, indicator)} Trend of {countryName} ({startYear}-{endYear})",
+        "plotData": { "labels": years.tolist(), "values": values.tolist() },
         "graph": "line",
-         "stats": { 
-            "average": avg_val, 
-            "total": total_val 
+         "stats": {
+            "average": avg_val,
+            "total": total_val,
+            "count": len(values)
         }
     }
+
+METRIC_LABELS = {"cagr": "CAGR", "yoy": "Average YoY Growth", "volatility": "Growth Volatility",
+                 "rolling_mean": "Rolling Mean"}
+DEFAULT_TOP = 20
+
+def growthScope(dataset, region):
+    """Sovereign rows of a region, or of every region when none is given."""
+    if region:
+        return dataset.regionRows(region)
+    return np.flatnonzero(~dataset.aggregate)
+
+def countryGrowth(dataset, row, countryName, metric, startYear, endYear, window):
+    """
+    A country's yearly series for the metric, with its window statistics: the
+    trailing mean for rolling_mean, otherwise the year-over-year growth that
+    cagr, yoy and volatility summarize (the title names what is plotted).
+    """
+    years, growthRows = growth.yoyGrowth(dataset, startYear, endYear)
+    if metric == "rolling_mean":
+        years, series = growth.rollingMean(dataset, window, startYear, endYear)
+        scale, unit = 1.0, None
+        plotted = f"{window}-Year Rolling Mean"
+    else:
+        series = growthRows
+        scale, unit = 100.0, "%"
+        plotted = "YoY Growth"
+    series = series[row]
+    valid = ~np.isnan(series)
+
+    counts, means, stds = growth.nanMoments(growthRows[row:row + 1])
+    rate = growth.cagr(dataset, startYear, endYear)[row]
+    result = {
+        "title": f"{plotted} of {countryName} ({startYear}-{endYear})",
+        "plotData": {"labels": years[valid].tolist(), "values": (series[valid] * scale).tolist()},
+        "graph": "line",
+        "metric": metric,
+        "stats": {
+            "cagr": float(rate * 100),
+            "mean_growth": float(means[0] * 100),
+            "volatility": float(stds[0] * 100),
+            "count": int(counts[0])
+        }
+    }
+    if unit:
+        result["unit"] = unit
+    else:
+        result["yLabel"] = f"{window}-Year Mean (USD)"
+    return result
+
+@instrument.timed("processor.processGrowth")
+def processGrowth(data, config, scores=None):
+    """
+    "growth" analyses: with a "country", that country's metric series; otherwise
+    the top (or, with "order": "asc", bottom) N entities of a region, or of all
+    regions, ranked by the metric. scores lets the planner share one
+    growth.metricScores pass between several rankings.
+    """
+    metric = config.get('metric', 'cagr')
+    startYear, endYear = config.get('start_year'), config.get('end_year')
+    window = config.get('window', growth.DEFAULT_WINDOW)
+    dataset = asDataset(data, config.get('indicator'))
+
+    if config.get('country'):
+        row = findCountryRow(dataset, config['country'])
+        if row is None:
+            return None
+        return countryGrowth(dataset, row, config['country'], metric, startYear, endYear, window)
+
+    if scores is None:
+        scores = growth.metricScores(dataset, metric, startYear, endYear, window)
+    region = config.get('region')
+    rows = growthScope(dataset, region)
+    rows = rows[~np.isnan(scores[rows])]
+    descending = config.get('order', 'desc') != 'asc'
+    ranked = ranking.selectTop(rows, scores[rows], config.get('top', DEFAULT_TOP), largest=descending)
+
+    scale = 1.0 if metric == "rolling_mean" else 100.0
+    values = scores[ranked] * scale
+    result = {
+        "title": f"{'Top' if descending else 'Bottom'} {len(ranked)} Countries{' in ' + region if region else ''} by {METRIC_LABELS[metric]} ({startYear}-{endYear})",
+        "resultValue": float(np.median(scores[rows]) * scale) if len(rows) else 0.0,
+        "count": len(rows),
+        "plotData": {"labels": dataset.countries[ranked].tolist(), "values": values.tolist()},
+        "metric": metric,
+        "region": region
+    }
+    if scale != 1.0:
+        result["unit"] = "%"
+    else:
+        result["yLabel"] = f"{window}-Year Mean (USD)"
+    return result
+
+@instrument.timed("processor.processRanking")
+def processRanking(data, config):
+    """
+    "ranking" analyses: the top or bottom N entities of a region (or of all
+    regions) by their value in one year, or those inside a percentile band.
+    Everything not selected is summarized under "others" so charts stay bounded.
+    """
+    targetRegion = config.get('region')
+    targetYear = config.get('year')
+    indicator = config.get('indicator')
+    dataset = asDataset(data, indicator)
+    label = seriesLabel(dataset, indicator)
+
+    col = dataset.yearColumn(targetYear)
+    rows = growthScope(dataset, targetRegion)
+    if col is not None:
+        rows = rows[dataset.mask[rows, col]]
+        values = dataset.values[rows, col]
+    else:
+        rows, values = rows[:0], np.empty(0)
+
+    scope = f" in {targetRegion}" if targetRegion else ""
+    if 'percentile' in config:
+        lower, upper = config['percentile']
+        selected = ranking.percentileBand(rows, values, lower, upper)
+        title = f"Countries{scope} in the {lower:g}-{upper:g} Percentile Band of {label} ({targetYear})"
+    elif 'bottom' in config:
+        selected = ranking.selectTop(rows, values, config['bottom'], largest=False)
+        title = f"Bottom {len(selected)} Countries{scope} by {label} ({targetYear})"
+    else:
+        selected = ranking.selectTop(rows, values, config.get('top', DEFAULT_TOP))
+        title = f"Top {len(selected)} Countries{scope} by {label} ({targetYear})"
+
+    selectedValues = dataset.values[selected, col] if len(selected) else np.empty(0)
+    selectedTotal = float(selectedValues.sum())
+    return {
+        "title": title,
+        "resultValue": selectedTotal,
+        "count": len(selected),
+        "plotData": {"labels": dataset.countries[selected].tolist(), "values": selectedValues.tolist()},
+        "others": {"count": len(rows) - len(selected), "value": float(values.sum()) - selectedTotal},
+        "year": targetYear,
+        "region": targetRegion
+    }
+
+def batchSeries(batch, indicator, cache):
+    """
+    The rows of a streamed batch that belong to indicator (see loader.iterBatches),
+    as a dataset tagged with its indicator code/name; memoized per batch in cache.
+    Batches without an Indicator Code column are a single series, matched only
+    by indicator None.
+    """
+    if indicator not in cache:
+        if batch.rowIndicators is None:
+            series = batch if indicator is None else batch.select(np.empty(0, dtype=np.intp))
+        else:
+            rows = np.flatnonzero(batch.rowIndicators == indicator)
+            series = batch.select(rows)
+            series.indicatorCode = indicator
+            series.indicatorName = batch.rowIndicatorNames[rows[0]] if len(rows) else None
+        cache[indicator] = series
+    return cache[indicator]
+
+@instrument.timed("processor.processAnalysisStream")
+def processAnalysisStream(batches, analyses, plotData=False):
+    """
+    Runs region and country_trend analyses in a single pass over an iterable of
+    dataset batches (see loader.iterBatches). Results come back in input order;
+    a country that never appears yields None, as with processCountryTrend.
+    Each analysis reads its "indicator" rows of a multi-indicator export (by
+    default the first Indicator Code in the stream). Region analyses share one
+    running accumulator per (indicator, region, year); their per-country
+    labels/values are only collected with plotData=True. Ranking and growth
+    analyses need the whole matrix and are not supported here (None).
+    """
+    regionGroups = {}
+    for i, analysis in enumerate(analyses):
+        if analysis.get("type", "region") == "region":
+            key = (analysis.get('indicator'), analysis.get('region'), analysis.get('year'))
+            if key not in regionGroups:
+                regionGroups[key] = (RunningStats(), [], [], [])
+            regionGroups[key][3].append(i)
+    trendJobs = {i: a for i, a in enumerate(analyses) if a.get("type") == "country_trend"}
+    results = [None] * len(analyses)
+    default, tagged = None, {}
+
+    for batch in batches:
+        if default is None and batch.rowIndicators is not None and len(batch):
+            default = batch.rowIndicators[0]
+        series = {}
+
+        def seriesFor(indicator):
+            code = indicator or default
+            dataset = batchSeries(batch, code, series)
+            if dataset.indicatorName:
+                tagged.setdefault(indicator, dataset)
+            return dataset
+
+        for (indicator, region, year), (stats, labels, values, jobs) in regionGroups.items():
+            dataset = seriesFor(indicator)
+            rows, gdpValues = regionYearSlice(dataset, region, year)
+            stats.update(gdpValues)
+            if plotData:
+                labels.extend(dataset.countries[rows].tolist())
+                values.extend(gdpValues.tolist())
+
+        for i, analysis in list(trendJobs.items()):
+            indicator = analysis.get('indicator')
+            result = processCountryTrend(seriesFor(indicator), analysis["country"], analysis["start_year"],
+                                         analysis["end_year"], indicator)
+            if result:
+                results[i] = result
+                del trendJobs[i]
+
+    for (indicator, region, year), (stats, labels, values, jobs) in regionGroups.items():
+        label = seriesLabel(tagged.get(indicator, GDPDataset.empty()), indicator)
+        for i in jobs:
+            operation = analyses[i].get('operation', 'average')
+            results[i] = {
+                "title": f"{operation.capitalize()} {label} of {region} in {year}",
+                "resultValue": stats.result(operation),
+                "count": stats.count,
+                "plotData": {"labels": list(labels), "values": list(values)},
+                "year": year,
+                "region": region
+            }
+
+    return results
@@ -0,0 +1,160 @@
+from functools import cached_property
+
+import numpy as np
+
+class RangeIndex:
+    """
+    Constant-time statistics over any [startYear, endYear] window of any entity.
+    Sums and counts come from per-row prefix sums built up front; min/max come from
+    sparse tables, built on the first min/max query since they cost log2(years)
+    copies of the matrix.
+    """
+
+    def __init__(self, dataset):
+        self.years = dataset.years
+        self.mask = dataset.mask
+        self.values = dataset.values
+        rows = len(dataset)
+
+        filled = np.where(self.mask, self.values, 0.0)
+        self.prefixSum = np.zeros((rows, len(self.years) + 1))
+        np.cumsum(filled, axis=1, out=self.prefixSum[:, 1:])
+        self.prefixCount = np.zeros((rows, len(self.years) + 1), dtype=np.int64)
+        np.cumsum(self.mask, axis=1, out=self.prefixCount[:, 1:])
+
+    # --- Helper Functions ---
+
+    def columnSpan(self, startYear, endYear):
+        """Half-open column range [lo, hi) covering the years in [startYear, endYear]."""
+        lo = int(np.searchsorted(self.years, startYear, side="left"))
+        hi = int(np.searchsorted(self.years, endYear, side="right"))
+        return lo, max(lo, hi)
+
+    @staticmethod
+    def buildSparseTable(base, combine):
+        levels = [base]
+        width = 1
+        while 2 * width <= base.shape[1]:
+            prev = levels[-1]
+            levels.append(combine(prev[:, :-width], prev[:, width:]))
+            width *= 2
+        return levels
+
+    @cached_property
+    def minTable(self):
+        return self.buildSparseTable(np.where(self.mask, self.values, np.inf), np.minimum)
+
+    @cached_property
+    def maxTable(self):
+        return self.buildSparseTable(np.where(self.mask, self.values, -np.inf), np.maximum)
+
+    def querySparse(self, levels, row, lo, hi, combine, empty):
+        if hi <= lo:
+            return empty
+        level = (hi - lo).bit_length() - 1
+        table = levels[level]
+        return combine(table[row, lo], table[row, hi - (1 << level)])
+
+    def updateRows(self, dataset, rows):
+        """Recomputes the prefix sums (and any sparse tables already built) for patched rows only."""
+        self.values = dataset.values
+        self.mask = dataset.mask
+        self.prefixSum[rows, 1:] = np.cumsum(np.where(self.mask[rows], self.values[rows], 0.0), axis=1)
+        self.prefixCount[rows, 1:] = np.cumsum(self.mask[rows], axis=1)
+
+        for name, fill, combine in (("minTable", np.inf, np.minimum), ("maxTable", -np.inf, np.maximum)):
+            levels = self.__dict__.get(name)
+            if levels is not None:
+                fresh = self.buildSparseTable(np.where(self.mask[rows], self.values[rows], fill), combine)
+                for level, part in zip(levels, fresh):
+                    level[rows] = part
+
+    # --- Range Queries ---
+
+    def count(self, row, startYear, endYear):
+        lo, hi = self.columnSpan(startYear, endYear)
+        return self.prefixCount[row, hi] - self.prefixCount[row, lo]
+
+    def total(self, row, startYear, endYear):
+        lo, hi = self.columnSpan(startYear, endYear)
+        return self.prefixSum[row, hi] - self.prefixSum[row, lo]
+
+    def average(self, row, startYear, endYear):
+        count = self.count(row, startYear, endYear)
+        total = self.total(row, startYear, endYear)
+        return np.divide(total, count, out=np.zeros_like(total, dtype=float), where=count > 0)
+
+    def minimum(self, row, startYear, endYear):
+        """Range minimum; NaN where the window holds no valid observation."""
+        lo, hi = self.columnSpan(startYear, endYear)
+        result = self.querySparse(self.minTable, row, lo, hi, np.minimum, np.inf)
+        return np.where(np.isinf(result), np.nan, result)
+
+    def maximum(self, row, startYear, endYear):
+        """Range maximum; NaN where the window holds no valid observation."""
+        lo, hi = self.columnSpan(startYear, endYear)
+        result = self.querySparse(self.maxTable, row, lo, hi, np.maximum, -np.inf)
+        return np.where(np.isinf(result), np.nan, result)
+
+class RegionRollup:
+    """
+    Region x year cube of sum, count, min and max over sovereign rows, built
+    once per dataset so a region statistic is a lookup rather than a column scan.
+    """
+
+    def __init__(self, dataset):
+        index = dataset.index
+        self.regionIds = {name: i for i, name in enumerate(index.regionNames)}
+        self.yearColumns = index.yearColumns
+        shape = (len(index.regionNames), len(dataset.years))
+
+        if not index.regionNames:
+            self.count = np.zeros(shape, dtype=np.int64)
+            self.sum = np.zeros(shape)
+            self.min = np.full(shape, np.nan)
+            self.max = np.full(shape, np.nan)
+            return
+
+        # Region rows laid end to end, so every statistic is one reduceat over the groups.
+        groups = [index.regionRows[name] for name in index.regionNames]
+        order = np.concatenate(groups)
+        starts = np.cumsum([0] + [len(g) for g in groups[:-1]])
+        mask = dataset.mask[order]
+        values = dataset.values[order]
+
+        self.count = np.add.reduceat(mask, starts, axis=0, dtype=np.int64)
+        self.sum = np.add.reduceat(np.where(mask, values, 0.0), starts, axis=0)
+        self.min = np.minimum.reduceat(np.where(mask, values, np.inf), starts, axis=0)
+        self.max = np.maximum.reduceat(np.where(mask, values, -np.inf), starts, axis=0)
+
+    def updateRegions(self, dataset, regionNames):
+        """Recomputes the cube rows of the given regions after their members were patched."""
+        index = dataset.index
+        for name in regionNames:
+            regionId = self.regionIds.get(name)
+            if regionId is None:
+                continue
+            rows = index.regionRows[name]
+            mask = dataset.mask[rows]
+            values = dataset.values[rows]
+            # Same reduction as __init__, so a patched cube matches a fresh build bit for bit.
+            self.count[regionId] = np.add.reduceat(mask, [0], axis=0, dtype=np.int64)[0]
+            self.sum[regionId] = np.add.reduceat(np.where(mask, values, 0.0), [0], axis=0)[0]
+            self.min[regionId] = np.minimum.reduceat(np.where(mask, values, np.inf), [0], axis=0)[0]
+            self.max[regionId] = np.maximum.reduceat(np.where(mask, values, -np.inf), [0], axis=0)[0]
+
+    def stat(self, regionName, year, operationName):
+        """processor.calculateStats semantics: 0.0 for no data or an unknown operation."""
+        regionId = self.regionIds.get(regionName)
+        col = self.yearColumns.get(year)
+        if regionId is None or col is None: return 0.0
+        count = self.count[regionId, col]
+        if count == 0: return 0.0
+        operations = {
+            "average": lambda: self.sum[regionId, col] / count,
+            "sum": lambda: self.sum[regionId, col],
+            "max": lambda: self.max[regionId, col],
+            "min": lambda: self.min[regionId, col]
+        }
+        func = operations.get(operationName.lower())
+        return float(func()) if func else 0.0
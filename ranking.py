@@ -0,0 +1,27 @@
+import numpy as np
+
+# --- Partial Selection ---
+
+def selectTop(rows, scores, n, largest=True):
+    """
+    The n rows with the largest (or smallest) scores, best first. Uses
+    argpartition, so only the n winners are sorted: O(len(rows) + n log n).
+    """
+    n = max(0, min(n, len(rows)))
+    if n == 0:
+        return rows[:0]
+    keys = -scores if largest else scores
+    if n < len(rows):
+        picked = np.argpartition(keys, n - 1)[:n]
+    else:
+        picked = np.arange(len(rows))
+    picked = picked[np.argsort(keys[picked], kind="stable")]
+    return rows[picked]
+
+def percentileBand(rows, scores, lower, upper):
+    """Rows whose score lies between the lower and upper percentiles (0-100), largest first."""
+    if len(rows) == 0:
+        return rows
+    lo, hi = np.percentile(scores, [lower, upper])
+    inBand = (scores >= lo) & (scores <= hi)
+    return selectTop(rows[inBand], scores[inBand], int(inBand.sum()))
@@ -0,0 +1,215 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import instrument
+import loader
+from dataset import GDPDataset
+
+# Resident numeric data (values + masks) kept across all indicators before cold ones are dropped.
+DEFAULT_MEMORY_BUDGET = 512 * 1024 * 1024
+
+# --- Helper Functions ---
+
+def alignRows(left, right):
+    """Row pairs (leftRows, rightRows) for the country codes present in both datasets."""
+    leftRows, rightRows = [], []
+    for row, code in enumerate(left.codes):
+        match = right.index.findCode(code)
+        if match is not None:
+            leftRows.append(row)
+            rightRows.append(match)
+    return np.array(leftRows, dtype=np.int64), np.array(rightRows, dtype=np.int64)
+
+def ratioDataset(numerator, denominator, scale=1.0):
+    """
+    Element-wise numerator / denominator over the shared countries and years,
+    e.g. GDP / population for GDP per capita. A cell is valid only when both
+    inputs are and the denominator is non-zero.
+    """
+    years = np.intersect1d(numerator.years, denominator.years)
+    numCols = np.searchsorted(numerator.years, years)
+    denCols = np.searchsorted(denominator.years, years)
+    numRows, denRows = alignRows(numerator, denominator)
+
+    num = numerator.values[np.ix_(numRows, numCols)]
+    den = denominator.values[np.ix_(denRows, denCols)]
+    mask = numerator.mask[np.ix_(numRows, numCols)] & denominator.mask[np.ix_(denRows, denCols)] & (den != 0)
+
+    values = np.full(num.shape, np.nan)
+    np.divide(num, den, out=values, where=mask)
+    values *= scale
+    return GDPDataset(years, values,
+                      numerator.countries[numRows], numerator.codes[numRows], numerator.regions[numRows],
+                      mask=mask)
+
+# --- Registry ---
+
+class DatasetRegistry:
+    """
+    Indicator code -> dataset catalogue over many World Bank CSV files. Files are
+    parsed (or mapped from their snapshot) on first use and kept in LRU order;
+    once the resident total passes memoryBudget the coldest indicators are
+    dropped and simply reload on their next use. Derived ratio indicators are
+    computed from their inputs the same way. Safe to share between threads.
+    """
+
+    def __init__(self, memoryBudget=DEFAULT_MEMORY_BUDGET, defaultIndicator=None):
+        self.memoryBudget = memoryBudget
+        self.defaultIndicator = defaultIndicator
+        self.loads = 0
+        self.evictions = 0
+        self._sources = {}
+        self._derived = {}
+        self._names = {}
+        self._resident = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __contains__(self, code):
+        return code in self._sources or code in self._derived
+
+    def canLoad(self, code):
+        """True when code is a registered file, or a ratio whose inputs can all be loaded."""
+        if code in self._sources:
+            return True
+        if code in self._derived:
+            numerator, denominator, _ = self._derived[code]
+            return self.canLoad(numerator) and self.canLoad(denominator)
+        return False
+
+    def indicators(self):
+        return list(self._sources) + list(self._derived)
+
+    def indicatorName(self, code):
+        return self._names.get(code)
+
+    def register(self, path, indicatorCode=None):
+        """Adds a CSV file without loading it; the code defaults to the file's Indicator Code column."""
+        code, name = loader.peekIndicator(path)
+        code = indicatorCode or code
+        if not code:
+            raise ValueError(f"{path} has no Indicator Code; pass indicatorCode explicitly")
+        with self._lock:
+            self._sources[code] = path
+            self._names[code] = name or code
+            self._resident.pop(code, None)
+            if self.defaultIndicator is None:
+                self.defaultIndicator = code
+        return code
+
+    def registerLoaded(self, dataset, indicatorCode=None):
+        """Adds a dataset that is already in memory (it can still be evicted and reloaded from its source)."""
+        code = indicatorCode or dataset.indicatorCode
+        with self._lock:
+            self._sources[code] = dataset.source
+            self._names[code] = dataset.indicatorName or code
+            self._resident[code] = dataset
+            if self.defaultIndicator is None:
+                self.defaultIndicator = code
+            self.evict(keep=code)
+        return code
+
+    def registerRatio(self, code, numerator, denominator, scale=1.0, name=None):
+        """Adds a derived indicator, e.g. registerRatio("GDP_PER_CAPITA", "NY.GDP.MKTP.CD", "SP.POP.TOTL")."""
+        with self._lock:
+            self._derived[code] = (numerator, denominator, scale)
+            self._names[code] = name or f"{numerator} / {denominator}"
+            self._resident.pop(code, None)
+        return code
+
+    # --- Loading And Eviction ---
+
+    def peek(self, code=None):
+        """The resident dataset for code, or None; never loads and never waits on a load in progress."""
+        code = code or self.defaultIndicator
+        dataset = self._resident.get(code)
+        if dataset is not None and self._lock.acquire(blocking=False):
+            try:
+                if code in self._resident:
+                    self._resident.move_to_end(code)
+            finally:
+                self._lock.release()
+        return dataset
+
+    def get(self, code=None):
+        code = code or self.defaultIndicator
+        # Resident indicators are served without queueing behind another indicator's load
+        dataset = self.peek(code)
+        if dataset is not None:
+            return dataset
+
+        with self._lock:
+            dataset = self._resident.get(code)
+            if dataset is not None:
+                self._resident.move_to_end(code)
+                return dataset
+
+            if code in self._derived:
+                numerator, denominator, scale = self._derived[code]
+                dataset = ratioDataset(self.get(numerator), self.get(denominator), scale)
+            elif code in self._sources:
+                dataset = loader.loadDataset(self._sources[code])
+            else:
+                raise KeyError(f"Unknown indicator '{code}'")
+
+            dataset.indicatorCode = code
+            dataset.indicatorName = self._names[code]
+            self.loads += 1
+            instrument.count("registry.loads")
+            self._resident[code] = dataset
+            self.evict(keep=code)
+            return dataset
+
+    def datasetFor(self, indicator=None):
+        """Hook used by dataset.asDataset so processor/planner calls accept a registry."""
+        return self.get(indicator)
+
+    def residentBytes(self):
+        return sum(d.nbytes for d in self._resident.values())
+
+    def evict(self, keep=None):
+        """Drops least recently used indicators until the resident total fits the budget."""
+        with self._lock:
+            while self.residentBytes() > self.memoryBudget and len(self._resident) > 1:
+                code = next(iter(self._resident))
+                if code == keep:
+                    self._resident.move_to_end(code)
+                    code = next(iter(self._resident))
+                del self._resident[code]
+                self.evictions += 1
+                instrument.count("registry.evictions")
+
+    def stats(self):
+        with self._lock:
+            return {
+                    "indicators": len(self),
+                    "resident": list(self._resident),
+                    "residentBytes": self.residentBytes(),
+                    "memoryBudget": self.memoryBudget,
+                    "loads": self.loads,
+                    "evictions": self.evictions
+                    }
+
+    def __len__(self):
+        return len(self._sources) + len(self._derived)
+
+def registryFromConfig(config, base, memoryBudget=DEFAULT_MEMORY_BUDGET):
+    """
+    Builds a registry around the base dataset (a GDPDataset or CSV path) plus
+    the config's optional "datasets" list: {"path": ..., "indicator": ...} for
+    files, {"indicator": ..., "numerator": ..., "denominator": ...} for ratios.
+    """
+    registry = DatasetRegistry(memoryBudget)
+    if isinstance(base, GDPDataset):
+        registry.registerLoaded(base)
+    else:
+        registry.register(base)
+
+    for entry in config.get("datasets", []):
+        if "path" in entry:
+            registry.register(entry["path"], entry.get("indicator"))
+        else:
+            registry.registerRatio(entry["indicator"], entry["numerator"], entry["denominator"],
+                                   entry.get("scale", 1.0), entry.get("name"))
+    return registry
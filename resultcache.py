@@ -0,0 +1,117 @@
+import copy
+import threading
+from collections import OrderedDict
+
+import instrument
+import processor
+from dataset import asDataset
+
+# Returned instead of a result when a cachedOnly lookup would have to compute or load.
+MISS = object()
+
+def residentDataset(data, indicator):
+    """The dataset for indicator if it is already in memory, else None (no registry load)."""
+    if hasattr(data, "peek"):
+        return data.peek(indicator)
+    return asDataset(data, indicator)
+
+class ResultCache:
+    """
+    LRU memo for processAnalysis / processCountryTrend keyed on the normalized
+    query, including its indicator. Each entry remembers the version of the
+    dataset it was computed from and is recomputed once that dataset has been
+    reloaded, so indicators can come and go without flushing each other; after
+    an incremental patch, rebase() keeps the entries the patch did not touch.
+    Safe to share between worker threads; computation runs outside the lock.
+    """
+
+    def __init__(self, maxSize=256):
+        if maxSize < 1:
+            raise ValueError("maxSize must be at least 1")
+        self.maxSize = maxSize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self), "maxSize": self.maxSize}
+
+    def rebase(self, dataset, oldVersion, patch):
+        """
+        Carries entries computed at oldVersion over to dataset's current version,
+        dropping those for the patch's affected regions and country codes
+        (see watcher.applyPatch). Returns the number of entries dropped.
+        """
+        dropped = 0
+        with self._lock:
+            for key, (version, result) in list(self._entries.items()):
+                if version != oldVersion:
+                    continue
+                subject = key[2]
+                affected = subject in (patch["regions"] if key[0] == "region" else patch["codes"])
+                if affected:
+                    del self._entries[key]
+                    dropped += 1
+                else:
+                    self._entries[key] = (dataset.version, result)
+        return dropped
+
+    def _lookup(self, dataset, key, compute, cachedOnly=False):
+        computedAt = dataset.version
+        with self._lock:
+            version, result = self._entries.get(key, (None, None))
+            if result is not None and version == dataset.version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                instrument.count("cache.hits")
+            elif cachedOnly:
+                return MISS
+            else:
+                result = None
+                self.misses += 1
+                instrument.count("cache.misses")
+
+        if result is None:
+            result = compute()
+            with self._lock:
+                self._entries[key] = (computedAt, result)
+                self._entries.move_to_end(key)
+                if len(self._entries) > self.maxSize:
+                    self._entries.popitem(last=False)
+
+        # Callers decorate results (e.g. result["graph"]), so never hand out the cached dict.
+        return copy.deepcopy(result)
+
+    # --- Cached Processor Calls ---
+    # With cachedOnly=True these return MISS rather than compute or load an indicator.
+
+    def analysis(self, data, config, cachedOnly=False):
+        indicator = config.get('indicator')
+        dataset = residentDataset(data, indicator) if cachedOnly else asDataset(data, indicator)
+        if dataset is None:
+            return MISS
+        operation = config.get('operation', 'average')
+        key = ("region", indicator, config.get('region'), config.get('year'), operation.lower())
+        normalized = {"region": key[2], "year": key[3], "operation": operation, "indicator": indicator}
+        return self._lookup(dataset, key, lambda: processor.processAnalysis(dataset, normalized), cachedOnly)
+
+    def countryTrend(self, data, countryName, startYear, endYear, indicator=None, cachedOnly=False):
+        dataset = residentDataset(data, indicator) if cachedOnly else asDataset(data, indicator)
+        if dataset is None:
+            return MISS
+        row = dataset.index.findCountry(countryName)
+        if row is None:
+            return None
+
+        # Keyed on the code rather than the row so entries survive patches that shift rows.
+        key = ("country_trend", indicator, dataset.codes[row], startYear, endYear)
+        canonical = dataset.countries[row]
+        return self._lookup(dataset, key, lambda: processor.processCountryTrend(dataset, canonical, startYear, endYear, indicator), cachedOnly)
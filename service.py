@@ -0,0 +1,310 @@
+"""
+Local HTTP query service: keeps the dataset resident and answers analyses as JSON.
+
+    python service.py --port 8765 --data gdp_with_continent_filled.csv --dataset pop.csv
+
+Endpoints (HTTP/1.1, keep-alive):
+  GET  /analysis?region=Asia&year=2020&operation=average[&indicator=..][&format=png]
+  GET  /trend?country=Pakistan&start_year=2000&end_year=2020[&indicator=..][&format=png]
+  POST /batch     body {"analyses": [...]} in config.json form; results in input order
+  GET  /metrics   per-endpoint request counts, errors and latency percentiles
+  GET  /health
+"""
+import argparse
+import asyncio
+import io
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+
+# Must run before visualizer pulls in pyplot so no GUI backend is ever loaded.
+import matplotlib
+matplotlib.use("Agg")
+
+import planner
+import registry
+import resultcache
+import visualizer
+
+DEFAULT_DATA = "gdp_with_continent_filled.csv"
+DEFAULT_PORT = 8765
+
+# Connections idle longer than this are closed; request heads/bodies beyond these are rejected.
+KEEPALIVE_TIMEOUT_S = 15
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 4 * 1024 * 1024
+
+# Latency samples kept per endpoint for the /metrics percentiles.
+METRICS_WINDOW = 4096
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+# --- Metrics ---
+
+class EndpointMetrics:
+    """Request/error counters and a sliding window of latencies per endpoint."""
+
+    def __init__(self, window=METRICS_WINDOW):
+        self.window = window
+        self.started = time.time()
+        self.endpoints = {}
+
+    def record(self, endpoint, seconds, ok):
+        entry = self.endpoints.get(endpoint)
+        if entry is None:
+            entry = self.endpoints[endpoint] = {"requests": 0, "errors": 0, "latencies": deque(maxlen=self.window)}
+        entry["requests"] += 1
+        entry["errors"] += 0 if ok else 1
+        entry["latencies"].append(seconds)
+
+    def snapshot(self):
+        report = {"uptime_s": time.time() - self.started, "endpoints": {}}
+        for name, entry in self.endpoints.items():
+            latencies = sorted(entry["latencies"])
+            pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+            report["endpoints"][name] = {
+                    "requests": entry["requests"],
+                    "errors": entry["errors"],
+                    "p50_ms": pick(0.50),
+                    "p95_ms": pick(0.95),
+                    "p99_ms": pick(0.99),
+                    "max_ms": latencies[-1] * 1000
+                    }
+        return report
+
+# --- Helper Functions ---
+
+def intParam(params, name):
+    try:
+        return int(params[name])
+    except KeyError:
+        raise HTTPError(400, f"missing parameter '{name}'")
+    except ValueError:
+        raise HTTPError(400, f"parameter '{name}' must be an integer")
+
+def strParam(params, name):
+    if not params.get(name):
+        raise HTTPError(400, f"missing parameter '{name}'")
+    return params[name]
+
+def indicatorParam(data, params):
+    indicator = params.get("indicator")
+    if indicator and hasattr(data, "datasetFor") and not data.canLoad(indicator):
+        raise HTTPError(404, f"unknown indicator '{indicator}'")
+    return indicator
+
+def renderPNG(result):
+    buffer = io.BytesIO()
+    if not visualizer.saveDashboard(result, buffer):
+        raise HTTPError(404, "no data to render")
+    return buffer.getvalue()
+
+def encodeResponse(status, body, contentType, keepAlive):
+    head = (f"HTTP/1.1 {status} {REASONS.get(status, 'OK')}\r\n"
+            f"Content-Type: {contentType}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keepAlive else 'close'}\r\n\r\n")
+    return head.encode("latin-1") + body
+
+def jsonBody(payload):
+    return json.dumps(payload).encode("utf-8")
+
+# --- Service ---
+
+class QueryService:
+    """
+    asyncio HTTP/1.1 server over a DatasetRegistry. Cached lookups are answered
+    inline on the event loop; cache misses (which may load an indicator),
+    batches and PNG rendering go to a thread pool so they never stall other
+    connections.
+    """
+
+    def __init__(self, data, workers=4, cacheSize=4096):
+        self.data = data
+        self.cache = resultcache.ResultCache(maxSize=cacheSize)
+        self.metrics = EndpointMetrics()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="service")
+        self.routes = {
+                ("GET", "/analysis"): self.analysis,
+                ("GET", "/trend"): self.trend,
+                ("POST", "/batch"): self.batch,
+                ("GET", "/metrics"): self.metricsEndpoint,
+                ("GET", "/health"): self.health
+                }
+
+    async def offload(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def cached(self, method, *args):
+        result = method(*args, cachedOnly=True)
+        if result is resultcache.MISS:
+            result = await self.offload(method, *args)
+        return result
+
+    async def respondResult(self, result, params):
+        if result is None:
+            raise HTTPError(404, "no matching data")
+        if params.get("format") == "png":
+            return 200, await self.offload(renderPNG, result), "image/png"
+        return 200, jsonBody(result), "application/json"
+
+    # --- Endpoints ---
+
+    async def analysis(self, params, body):
+        config = {"region": strParam(params, "region"), "year": intParam(params, "year"),
+                  "operation": params.get("operation", "average"), "indicator": indicatorParam(self.data, params)}
+        result = await self.cached(self.cache.analysis, self.data, config)
+        if result is None:
+            raise HTTPError(404, "no matching data")
+        result["graph"] = params.get("graph", "bar")
+        return await self.respondResult(result, params)
+
+    async def trend(self, params, body):
+        result = await self.cached(self.cache.countryTrend, self.data, strParam(params, "country"), intParam(params, "start_year"),
+                                         intParam(params, "end_year"), indicatorParam(self.data, params))
+        return await self.respondResult(result, params)
+
+    async def batch(self, params, body):
+        try:
+            config = json.loads(body or b"{}")
+        except ValueError as e:
+            raise HTTPError(400, f"invalid JSON: {e}")
+        if not isinstance(config, dict) or not planner.validateConfig(config):
+            raise HTTPError(400, "invalid batch; expected {\"analyses\": [...]} as in config.json")
+        if "datasets" in config:
+            raise HTTPError(400, "\"datasets\" is not accepted here; start the service with --dataset instead")
+        for analysis in config["analyses"]:
+            indicatorParam(self.data, analysis)
+        results = await self.offload(planner.runAnalyses, self.data, config["analyses"])
+        return 200, jsonBody({"results": results}), "application/json"
+
+    async def metricsEndpoint(self, params, body):
+        report = self.metrics.snapshot()
+        report["cache"] = self.cache.stats()
+        if hasattr(self.data, "stats"):
+            report["datasets"] = self.data.stats()
+        return 200, jsonBody(report), "application/json"
+
+    async def health(self, params, body):
+        return 200, jsonBody({"status": "ok"}), "application/json"
+
+    # --- Connection Handling ---
+
+    async def readRequest(self, reader):
+        """Returns (method, path, params, headers, body), or None when the client closed the connection."""
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEPALIVE_TIMEOUT_S)
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            return None
+        except asyncio.LimitOverrunError:
+            raise HTTPError(413, "request head too large")
+
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "malformed request line")
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        headers[":version"] = version
+
+        try:
+            length = int(headers.get("content-length", 0) or 0)
+        except ValueError:
+            raise HTTPError(400, "invalid Content-Length")
+        if length < 0:
+            raise HTTPError(400, "invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, "request body too large")
+        body = await reader.readexactly(length) if length else b""
+
+        url = urlsplit(target)
+        return method.upper(), url.path, dict(parse_qsl(url.query)), headers, body
+
+    async def handleConnection(self, reader, writer):
+        try:
+            while True:
+                keepAlive = False
+                try:
+                    request = await self.readRequest(reader)
+                    if request is None:
+                        break
+                    method, path, params, headers, body = request
+                    connection = headers.get("connection", "").lower()
+                    keepAlive = connection == "keep-alive" or (headers[":version"] == "HTTP/1.1" and connection != "close")
+
+                    start = time.perf_counter()
+                    handler = self.routes.get((method, path))
+                    try:
+                        if handler is None:
+                            known = any(p == path for _, p in self.routes)
+                            raise HTTPError(405 if known else 404, f"no route for {method} {path}")
+                        status, payload, contentType = await handler(params, body)
+                    except HTTPError as e:
+                        status, payload, contentType = e.status, jsonBody({"error": str(e)}), "application/json"
+                    except Exception as e:
+                        status, payload, contentType = 500, jsonBody({"error": str(e)}), "application/json"
+                    self.metrics.record(path if handler else "unknown", time.perf_counter() - start, status < 500)
+                except HTTPError as e:
+                    status, payload, contentType = e.status, jsonBody({"error": str(e)}), "application/json"
+
+                writer.write(encodeResponse(status, payload, contentType, keepAlive))
+                await writer.drain()
+                if not keepAlive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT):
+        return await asyncio.start_server(self.handleConnection, host, port, limit=MAX_HEADER_BYTES)
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+# --- Main ---
+
+def parseArgs(argv):
+    parser = argparse.ArgumentParser(description="Serve GDP analyses over HTTP as JSON.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("-d", "--data", default=DEFAULT_DATA, help="Default indicator CSV file")
+    parser.add_argument("--dataset", action="append", default=[], help="Extra indicator CSV file (repeatable)")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="Threads for batches and PNG rendering")
+    return parser.parse_args(argv)
+
+async def serve(args):
+    data = registry.registryFromConfig({"datasets": [{"path": p} for p in args.dataset]}, args.data)
+    data.get()  # load the default indicator before accepting connections
+    service = QueryService(data, workers=args.workers)
+    server = await service.start(args.host, args.port)
+    print(f"Serving {', '.join(data.indicators())} on http://{args.host}:{args.port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+def main(argv=None):
+    args = parseArgs(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from dataset import GDPDataset
+
+# Bump when the on-disk layout changes so stale snapshots are rebuilt.
+SNAPSHOT_FORMAT = 2
+CACHE_DIR = ".gdp_cache"
+
+# --- Helper Functions ---
+
+def snapshotPaths(sourcePath: str) -> Dict[str, str]:
+    """Snapshot files live in a cache folder next to the source CSV."""
+    folder = os.path.join(os.path.dirname(os.path.abspath(sourcePath)), CACHE_DIR)
+    stem = os.path.join(folder, os.path.basename(sourcePath))
+    return {
+            "dir": folder,
+            "values": stem + ".values.npy",
+            "mask": stem + ".mask.npy",
+            "meta": stem + ".meta.json"
+            }
+
+def fileDigest(path: str, chunkSize: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunkSize), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def sourceSignature(path: str, withHash: bool = True) -> Dict[str, Any]:
+    stat = os.stat(path)
+    signature = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    if withHash:
+        signature["sha256"] = fileDigest(path)
+    return signature
+
+def writeAtomic(path: str, writer) -> None:
+    """Writes through a uniquely named temp file, so concurrent writers (GUI, CLI) never share one."""
+    fd, tmpPath = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            writer(f)
+        os.replace(tmpPath, path)
+    except BaseException:
+        try:
+            os.remove(tmpPath)
+        except OSError:
+            pass
+        raise
+
+# --- Main Functions ---
+
+def saveSnapshot(dataset: GDPDataset, sourcePath: str, signature: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Writes the parsed dataset as raw .npy arrays plus a JSON metadata sidecar.
+    Pass the signature taken before parsing so edits made mid-parse invalidate it.
+    """
+    paths = snapshotPaths(sourcePath)
+    os.makedirs(paths["dir"], exist_ok=True)
+
+    writeAtomic(paths["values"], lambda f: np.save(f, np.ascontiguousarray(dataset.values)))
+    writeAtomic(paths["mask"], lambda f: np.save(f, np.ascontiguousarray(dataset.mask)))
+
+    # The sidecar is written last so a half-written snapshot is never trusted.
+    meta = {
+            "format": SNAPSHOT_FORMAT,
+            "source": signature or sourceSignature(sourcePath),
+            "years": dataset.years.tolist(),
+            "countries": dataset.countries.tolist(),
+            "codes": dataset.codes.tolist(),
+            "regions": dataset.regions.tolist()
+            }
+    writeAtomic(paths["meta"], lambda f: f.write(json.dumps(meta).encode("utf-8")))
+
+def loadSnapshot(sourcePath: str, verifyHash: bool = False) -> Optional[GDPDataset]:
+    """
+    Memory-maps a snapshot if it still matches the source file, else returns None.
+    A size/mtime match is trusted unless verifyHash is set; a mismatch falls back
+    to comparing content hashes so a touched-but-unchanged file keeps its snapshot.
+    """
+    paths = snapshotPaths(sourcePath)
+    try:
+        with open(paths["meta"], "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if meta.get("format") != SNAPSHOT_FORMAT:
+        return None
+
+    cached = meta.get("source", {})
+    current = sourceSignature(sourcePath, withHash=False)
+    statMatches = all(cached.get(k) == v for k, v in current.items())
+
+    if not statMatches or verifyHash:
+        if cached.get("size") != current["size"] or cached.get("sha256") != fileDigest(sourcePath):
+            return None
+        if not statMatches:
+            # Only saves re-hashing next time; a read-only cache is still usable.
+            meta["source"] = dict(cached, **current)
+            try:
+                writeAtomic(paths["meta"], lambda f: f.write(json.dumps(meta).encode("utf-8")))
+            except OSError as e:
+                print(f"Warning: could not refresh dataset cache metadata: {e}")
+
+    try:
+        values = np.load(paths["values"], mmap_mode="r")
+        mask = np.load(paths["mask"], mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+
+    return GDPDataset(meta["years"], values, meta["countries"], meta["codes"], meta["regions"], mask=mask)
@@ -0,0 +1,14 @@
+import os
+import sys
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(TESTS_DIR)
+sys.path.insert(0, REPO_ROOT)
+
+BUNDLED_CSV = os.path.join(REPO_ROOT, "gdp_with_continent_filled.csv")
+
+@pytest.fixture
+def bundled_csv():
+    return BUNDLED_CSV
@@ -0,0 +1,50 @@
+"""Parity of the fast columnar parser (loader.parseColumnar) with the csv.DictReader reference path."""
+import numpy as np
+import pytest
+
+import loader
+
+HEADER = "Country Name,Country Code,Indicator Name,Indicator Code,2000,2001,2002,Continent\n"
+
+EDGE_ROWS = {
+        "blank": "A,AAA,x,y,1,,3,Asia",
+        "space": "B,BBB,x,y,1, ,3,Asia",
+        "tab": "C,CCC,x,y,1,\t,3,Asia",
+        "nbsp": "D,DDD,x,y,1,\xa0,3,Asia",
+        "padded": "E,EEE,x,y, 2,4 ,3 ,Asia",
+        "dots": "F,FFF,x,y,1,..,3,Asia",
+        "quoted": '"G, H",GGG,x,y,1,"  ",3,Asia',
+        "negative": "I,III,x,y,-1,,3,Asia",
+        "all_blank": "J,JJJ,x,y,,,,Asia",
+        "plain": "K,KKK,x,y,1,2,3,Asia"
+        }
+
+def assertSameDataset(fast, reference):
+    assert fast.years.tolist() == reference.years.tolist()
+    assert fast.countries.tolist() == reference.countries.tolist()
+    assert fast.codes.tolist() == reference.codes.tolist()
+    assert fast.regions.tolist() == reference.regions.tolist()
+    assert np.array_equal(fast.mask, reference.mask)
+    assert np.array_equal(fast.values[fast.mask], reference.values[reference.mask])
+
+def writeCSV(tmp_path, rows):
+    path = tmp_path / "edge.csv"
+    path.write_text(HEADER + "\n".join(rows) + "\n", encoding="utf-8")
+    return str(path)
+
+def test_bundled_csv_matches_reference(bundled_csv):
+    assertSameDataset(loader.parseColumnar(bundled_csv), loader.parseDataset(bundled_csv))
+
+@pytest.mark.parametrize("case", sorted(EDGE_ROWS))
+def test_edge_cell_matches_reference(tmp_path, case):
+    path = writeCSV(tmp_path, [EDGE_ROWS[case]])
+    assertSameDataset(loader.parseColumnar(path), loader.parseDataset(path))
+
+def test_mixed_chunk_matches_reference(tmp_path):
+    path = writeCSV(tmp_path, list(EDGE_ROWS.values()))
+    assertSameDataset(loader.parseColumnar(path), loader.parseDataset(path))
+
+def test_whitespace_cell_is_missing(tmp_path):
+    path = writeCSV(tmp_path, [EDGE_ROWS["space"]])
+    dataset = loader.parseColumnar(path)
+    assert dataset.mask.tolist() == [[True, False, True]]
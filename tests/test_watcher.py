@@ -0,0 +1,132 @@
+"""An incrementally patched dataset (watcher.applyPatch) must match a fresh load of the edited file."""
+import csv
+import shutil
+
+import numpy as np
+import pytest
+
+import loader
+import resultcache
+import watcher
+
+WINDOWS = ((1960, 2024), (1990, 2000), (2015, 2020), (2020, 2020))
+
+# --- Helpers ---
+
+def readRows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    return rows[0], rows[1:]
+
+def writeRows(path, header, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+def rowFor(header, rows, code):
+    column = header.index("Country Code")
+    return next(row for row in rows if row[column] == code)
+
+def load(path):
+    """Fresh load with every lazily built structure (sparse tables included) in place."""
+    dataset = loader.loadDataset(path, useCache=False)
+    dataset.ranges.minTable, dataset.ranges.maxTable
+    return dataset
+
+def same(a, b):
+    return np.array_equal(a, b, equal_nan=True)
+
+def assertMatchesFresh(patched, fresh):
+    assert patched.index.regionNames == fresh.index.regionNames
+    for name in ("count", "sum", "min", "max"):
+        assert same(getattr(patched.rollup, name), getattr(fresh.rollup, name)), name
+
+    assert sorted(patched.codes.tolist()) == sorted(fresh.codes.tolist())
+    for code in fresh.codes.tolist():
+        row, freshRow = patched.index.findCode(code), fresh.index.findCode(code)
+        assert patched.countries[row] == fresh.countries[freshRow]
+        assert patched.regions[row] == fresh.regions[freshRow]
+        for start, end in WINDOWS:
+            assert same(patched.ranges.total(row, start, end), fresh.ranges.total(freshRow, start, end))
+            assert same(patched.ranges.minimum(row, start, end), fresh.ranges.minimum(freshRow, start, end))
+            assert same(patched.ranges.maximum(row, start, end), fresh.ranges.maximum(freshRow, start, end))
+
+def fillCache(dataset, codes):
+    cache = resultcache.ResultCache(maxSize=1024)
+    for region in dataset.index.regionNames:
+        cache.analysis(dataset, {"region": region, "year": 2020, "operation": "sum"})
+    for code in codes:
+        cache.countryTrend(dataset, dataset.countries[dataset.index.findCode(code)], 2000, 2020)
+    return cache
+
+def patchAndCompare(path, dataset, cache):
+    oldVersion, before = dataset.version, set(cache._entries)
+    new, diff = watcher.reloadChanges(dataset, path)
+    patch = watcher.applyPatch(dataset, new, diff)
+    dropped = cache.rebase(dataset, oldVersion, patch)
+
+    assertMatchesFresh(dataset, load(path))
+
+    affected = {key for key in before
+                if key[2] in (patch["regions"] if key[0] == "region" else patch["codes"])}
+    assert set(cache._entries) == before - affected
+    assert dropped == len(affected)
+    assert all(version == dataset.version for version, _ in cache._entries.values())
+    return patch
+
+@pytest.fixture
+def source(tmp_path, bundled_csv):
+    path = tmp_path / "gdp.csv"
+    shutil.copy(bundled_csv, path)
+    return str(path)
+
+def sovereignCodes(dataset, count):
+    """Country codes of the first sovereign rows in distinct regions."""
+    codes, seen = [], set()
+    for row in np.flatnonzero(~dataset.aggregate):
+        region = dataset.regions[row]
+        if region not in seen:
+            seen.add(region)
+            codes.append(dataset.codes[row])
+        if len(codes) == count:
+            break
+    return codes
+
+# --- Tests ---
+
+def test_value_edit_matches_fresh_load(source):
+    dataset = load(source)
+    edited, untouched = sovereignCodes(dataset, 2)
+    cache = fillCache(dataset, [edited, untouched])
+
+    header, rows = readRows(source)
+    row = rowFor(header, rows, edited)
+    row[header.index("2020")] = "123456789.5"
+    row[header.index("2019")] = ""
+    writeRows(source, header, rows)
+
+    patch = patchAndCompare(source, dataset, cache)
+    assert not patch["structural"]
+    assert patch["codes"] == {edited}
+    assert ("country_trend", None, untouched, 2000, 2020) in cache._entries
+
+def test_added_and_relabelled_rows_match_fresh_load(source):
+    dataset = load(source)
+    relabelled, edited = sovereignCodes(dataset, 2)
+    cache = fillCache(dataset, [relabelled, edited])
+
+    header, rows = readRows(source)
+    codeColumn, nameColumn, regionColumn = header.index("Country Code"), header.index("Country Name"), header.index("Continent")
+    target = rowFor(header, rows, relabelled)
+    target[regionColumn] = rowFor(header, rows, edited)[regionColumn]
+    rowFor(header, rows, edited)[header.index("2020")] = "42.0"
+
+    added = list(rowFor(header, rows, edited))
+    added[codeColumn], added[nameColumn] = "ZZZ", "Testland"
+    rows.append(added)
+    writeRows(source, header, rows)
+
+    patch = patchAndCompare(source, dataset, cache)
+    assert patch["structural"]
+    assert {relabelled, edited, "ZZZ"} <= patch["codes"]
@@ -1,9 +1,35 @@
-import matplotlib.pyplot as plt
+import numpy as np
+
+import instrument
+import ranking
 
 # --- Style Configuration ---
-plt.style.use('dark_background')
 COLORS = ['#8dd3c7', '#ffffb3', '#bebada', '#fb8072', '#80b1d3', '#fdb462', '#b3de69', '#fccde5']
 
+# Pie slices under this share of the total, or beyond this many slices, are lumped into "Others"
+PIE_MIN_SHARE = 0.01
+PIE_MAX_SLICES = 24
+
+# Large-series mode: past these sizes lines are LTTB-downsampled to LARGE_SERIES_POINTS
+# without markers, bars become one filled step artist, fills are rasterized and only
+# about MAX_TICK_LABELS category labels are drawn, so frame time stops growing with the data.
+LARGE_SERIES_POINTS = 500
+LARGE_BAR_COUNT = 200
+MAX_TICK_LABELS = 80
+
+# Matplotlib is imported on the first chart request, not at import time,
+# so the GUI window can paint before the plotting stack has loaded.
+_pyplot = None
+
+def get_pyplot():
+    """Imports pyplot and applies the dark style once, on first use."""
+    global _pyplot
+    if _pyplot is None:
+        import matplotlib.pyplot as plt
+        plt.style.use('dark_background')
+        _pyplot = plt
+    return _pyplot
+
 def shorten_label(label, max_len=50):
     """
     Helper: Cuts off long names so they don't clutter the graph.
@@ -13,7 +39,133 @@ def shorten_label(label, max_len=50):
         return label[:max_len] + "..."
     return label
 
-def plotDashboard(result):
+def y_label(result):
+    if result.get("unit") == "%":
+        return "Growth (%)"
+    return result.get("yLabel", "GDP (USD)")
+
+def bucket_others(labels, values, others=None):
+    """
+    Keeps the largest slices (at most PIE_MAX_SLICES, each at least
+    PIE_MIN_SHARE of the total) in their original order and sums the rest,
+    plus any "others" a ranking result already set aside, into one bucket.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    rest = others["value"] if others else 0.0
+    threshold = PIE_MIN_SHARE * (values.sum() + rest)
+
+    rows = np.arange(len(values))
+    keep = np.sort(ranking.selectTop(rows, values, PIE_MAX_SLICES))
+    keep = keep[values[keep] >= threshold]
+
+    dropped = np.ones(len(values), dtype=bool)
+    dropped[keep] = False
+
+    main_labels = [labels[i] for i in keep]
+    main_values = values[keep].tolist()
+    rest += values[dropped].sum()
+    if rest > 0:
+        main_labels.append("Others")
+        main_values.append(rest)
+    return main_labels, main_values
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling: keeps the first and last points
+    and, from each of threshold - 2 buckets, the point forming the largest
+    triangle with the previous pick and the next bucket's mean.
+    Returns the indices to keep.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    picked = np.empty(threshold, dtype=np.int64)
+    picked[0], picked[-1] = 0, n - 1
+    prev = 0
+    for b in range(threshold - 2):
+        lo, hi = edges[b], edges[b + 1]
+        nlo, nhi = hi, edges[b + 2] if b + 2 < len(edges) else n
+        next_x = x[nlo:nhi].mean() if nhi > nlo else x[-1]
+        next_y = y[nlo:nhi].mean() if nhi > nlo else y[-1]
+        area = np.abs((x[prev] - next_x) * (y[lo:hi] - y[prev]) - (x[prev] - x[lo:hi]) * (next_y - y[prev]))
+        prev = lo + int(area.argmax())
+        picked[b + 1] = prev
+    return picked
+
+def downsample(x, y):
+    """(x, y) reduced to at most LARGE_SERIES_POINTS by LTTB."""
+    keep = lttb(x, y, LARGE_SERIES_POINTS)
+    return x[keep], y[keep]
+
+def series_axis(labels):
+    """Numeric x positions for a line: the labels themselves (years) or 0..n-1 for text labels."""
+    if all(isinstance(l, (int, float, np.integer, np.floating)) for l in labels[:1]):
+        return np.asarray(labels, dtype=np.float64), False
+    return np.arange(len(labels), dtype=np.float64), True
+
+def thin_ticks(ax, positions, labels):
+    """Labels at most MAX_TICK_LABELS evenly spaced categories."""
+    step = max(1, -(-len(labels) // MAX_TICK_LABELS))
+    ax.set_xticks(positions[::step])
+    ax.set_xticklabels(labels[::step])
+
+def draw_line(ax, x, y, artists):
+    """Line plus fill; large series are downsampled, drawn without markers and with a rasterized fill."""
+    large = len(x) > LARGE_SERIES_POINTS
+    xs, ys = downsample(x, y) if large else (x, y)
+    marker = {} if large else dict(marker='o', markersize=8, markerfacecolor='#ffffff', markeredgecolor='#00ffcc')
+    artists["line"], = ax.plot(xs, ys, color='#00ffcc', linewidth=2 if not large else 1.2, **marker)
+    artists["fill"] = ax.fill_between(xs, ys, color='#00ffcc', alpha=0.1, rasterized=large)
+    artists["x"], artists["y"] = x, y
+
+def has_data(result):
+    return bool(result["plotData"]["labels"]) and bool(result["plotData"]["values"])
+
+def draw_dashboard(fig, result):
+    """
+    Draws a processor result onto an existing figure.
+    Returns False (and leaves the figure empty) for unknown graph types.
+    """
+    ax = fig.add_subplot(111)
+    with instrument.span("visualizer.axes"):
+        artists = draw_axes(ax, result)
+    if artists is None:
+        fig.delaxes(ax)
+        return False
+
+    with instrument.span("visualizer.layout"):
+        fig.subplots_adjust(bottom=0.25)
+    return True
+
+def format_stats(result):
+    if "metric" in result:
+        # Growth results: a ranking's median score, or a country's window statistics
+        unit = result.get("unit")
+        if "resultValue" in result:
+            value = result["resultValue"]
+            return f"Median:\n{value:,.2f}%" if unit == "%" else f"Median:\n${value:,.2f}"
+        stats = result.get("stats", {})
+        return (f"CAGR: {stats.get('cagr', 0):,.2f}%\n\nMean Growth: {stats.get('mean_growth', 0):,.2f}%"
+                f"\n\nVolatility: {stats.get('volatility', 0):,.2f}%")
+    elif "resultValue" in result:
+      
+        val = result["resultValue"]
+        return f"Calculated Result:\n${val:,.2f}"
+    elif "stats" in result:
+      
+        avg = result["stats"].get("average", 0)
+        tot = result["stats"].get("total", 0)
+        return f"Period Average:\n${avg:,.2f}\n\nTotal Volume:\n${tot:,.2f}"
+    return ""
+
+def draw_axes(ax, result):
+    """
+    Draws a processor result onto one axes and returns the artists a later
+    in-place update needs, or None for unknown graph types.
+    """
+    artists = {}
     graphType = result.get("graph", "bar")
     
     # Get Data
@@ -21,23 +173,33 @@ def plotDashboard(result):
     values = result["plotData"]["values"]
     title = result["title"]
 
-    if not raw_labels or not values:
-        print("No data available.")
-        return
-
-
     labels = [shorten_label(l) for l in raw_labels]
 
-    # Create Figure
-    fig = plt.figure(figsize=(12, 7), facecolor='#1e1e1e')
-    ax = fig.add_subplot(111)
+    # Wedges need non-negative sizes with a positive total (growth rates can be negative)
+    if graphType == "pie":
+        sizes = np.asarray(values, dtype=np.float64)
+        if not (np.all(sizes >= 0) and sizes.sum() > 0):
+            graphType = "bar"
+
     ax.set_facecolor('#1e1e1e')
 
     # --- BAR CHART ---
-    if graphType == "bar":
-        ax.bar(labels, values, color=COLORS[:len(labels)], edgecolor='white', alpha=0.8)
+    if graphType == "bar" and len(labels) > LARGE_BAR_COUNT:
+        positions = np.arange(len(labels))
+        artists["steps"] = ax.stairs(values, np.arange(len(labels) + 1) - 0.5, fill=True,
+                                     color=COLORS[0], alpha=0.8, rasterized=True)
+        thin_ticks(ax, positions, labels)
+        ax.set_ylabel(y_label(result), color='white', fontsize=12)
+        ax.tick_params(axis='x', rotation=90, colors='white', labelsize=8)
+        ax.tick_params(axis='y', colors='white')
+        ax.grid(axis='y', linestyle='--', alpha=0.3, color='gray', zorder=0)
+
+    elif graphType == "bar":
+        artists["bars"] = ax.bar(labels, values, color=COLORS[:len(labels)], edgecolor='white', alpha=0.8)
+        if len(labels) > MAX_TICK_LABELS:
+            thin_ticks(ax, np.arange(len(labels)), labels)
         
-        ax.set_ylabel("GDP (USD)", color='white', fontsize=12)
+        ax.set_ylabel(y_label(result), color='white', fontsize=12)
         
         if len(labels) > 10:
             font_size = 8
@@ -52,16 +214,7 @@ def plotDashboard(result):
 
     # --- PIE CHART ---
     elif graphType == "pie":
-        total = sum(values)
-        threshold = 0.01 * total
-        
-        main_labels = [l for l, v in zip(labels, values) if v >= threshold]
-        main_values = [v for v in values if v >= threshold]
-        
-        others = sum([v for v in values if v < threshold])
-        if others > 0:
-            main_labels.append("Others")
-            main_values.append(others)
+        main_labels, main_values = bucket_others(labels, values, result.get("others"))
 
 
         wedges, texts, autotexts = ax.pie(
@@ -74,17 +227,18 @@ def plotDashboard(result):
             center=(0, 0), 
             textprops={'color':"white"}
         )
-        plt.setp(autotexts, size=10, weight="bold", color="black")
+        for autotext in autotexts:
+            autotext.set(size=10, weight="bold", color="black")
 
     # --- LINE CHART ---
     elif graphType == "line":
-        ax.plot(labels, values, color='#00ffcc', linewidth=2, marker='o', 
-                markersize=8, markerfacecolor='#ffffff', markeredgecolor='#00ffcc')
-        
-        ax.fill_between(labels, values, color='#00ffcc', alpha=0.1)
+        x, categorical = series_axis(labels)
+        draw_line(ax, x, np.asarray(values, dtype=np.float64), artists)
+        if categorical:
+            thin_ticks(ax, x, labels)
         
         ax.set_xlabel("Year", color='white', fontsize=12)
-        ax.set_ylabel("GDP (USD)", color='white', fontsize=12)
+        ax.set_ylabel(y_label(result), color='white', fontsize=12)
         
         # Vertical X-Axis Labels
         ax.tick_params(axis='x', rotation=90, colors='white')
@@ -94,24 +248,14 @@ def plotDashboard(result):
 
     else:
         print(f"Unknown graph type: {graphType}")
-        return
+        return None
 
     # --- STATS BOX LOGIC ---
 
-    stat_text = ""
-    if "resultValue" in result:
-      
-        val = result["resultValue"]
-        stat_text = f"Calculated Result:\n${val:,.2f}"
-    elif "stats" in result:
-      
-        avg = result["stats"].get("average", 0)
-        tot = result["stats"].get("total", 0)
-        stat_text = f"Period Average:\n${avg:,.2f}\n\nTotal Volume:\n${tot:,.2f}"
-
+    stat_text = format_stats(result)
 
     if stat_text:
-        ax.text(0.98, 0.98, stat_text, transform=ax.transAxes,
+        artists["stats"] = ax.text(0.98, 0.98, stat_text, transform=ax.transAxes,
                 fontsize=11, color='#00ffcc', fontweight='bold',
                 ha='right', va='top', 
                 bbox=dict(boxstyle="round,pad=0.5", fc="#333333", ec="white", alpha=0.9))
@@ -125,5 +269,179 @@ def plotDashboard(result):
     ax.spines['bottom'].set_color('white')
     ax.spines['left'].set_color('white')
 
-    plt.subplots_adjust(bottom=0.25)
-    plt.show()
+    return artists
+
+@instrument.timed("visualizer.plotDashboard")
+def plotDashboard(result, block=True):
+    """
+    Opens the result in a pyplot window. Pass block=False from code that already
+    runs an event loop (the Tk GUI) so the call returns immediately.
+    """
+    if not has_data(result):
+        print("No data available.")
+        return
+
+    # Create Figure
+    with instrument.span("visualizer.import"):
+        plt = get_pyplot()
+    with instrument.span("visualizer.figure"):
+        fig = plt.figure(figsize=(12, 7), facecolor='#1e1e1e')
+    if not draw_dashboard(fig, result):
+        plt.close(fig)
+        return
+    with instrument.span("visualizer.show"):
+        plt.show(block=block)
+    if block:
+        # The window has been closed; drop the figure from pyplot's registry
+        plt.close(fig)
+
+@instrument.timed("visualizer.saveDashboard")
+def saveDashboard(result, path):
+    """
+    Renders a result straight to an image file (format taken from the extension).
+    Uses a bare Figure, so no GUI backend or pyplot figure registry is involved.
+    Returns True if a file was written.
+    """
+    if not has_data(result):
+        print(f"No data available for '{result.get('title', path)}'.")
+        return False
+
+    with instrument.span("visualizer.import"):
+        get_pyplot()
+        from matplotlib.figure import Figure
+    with instrument.span("visualizer.figure"):
+        fig = Figure(figsize=(12, 7), facecolor='#1e1e1e')
+    if not draw_dashboard(fig, result):
+        return False
+    with instrument.span("visualizer.savefig"):
+        fig.savefig(path, facecolor=fig.get_facecolor())
+    return True
+
+class DashboardCanvas:
+    """
+    One long-lived figure and axes for embedding in a GUI. Re-rendering a bar or
+    line chart over the same labels only updates the existing artists; anything
+    else clears and redraws the same axes, so no figures pile up. Range
+    highlights on line charts are blitted over a cached background.
+    """
+
+    def __init__(self, figsize=(8, 5)):
+        get_pyplot()
+        from matplotlib.figure import Figure
+        self.figure = Figure(figsize=figsize, facecolor='#1e1e1e')
+        self.ax = self.figure.add_subplot(111)
+        self.figure.subplots_adjust(bottom=0.25)
+        self.artists = {}
+        self.layout = None
+        self.background = None
+        self.range_artists = None
+
+    @instrument.timed("visualizer.canvas.render")
+    def render(self, result):
+        """Draws the result; returns False if there was nothing to draw."""
+        graphType = result.get("graph", "bar")
+        labels = [shorten_label(l) for l in result["plotData"]["labels"]]
+        layout = (graphType, labels)
+
+        if not has_data(result):
+            self.reset()
+            self.ax.text(0.5, 0.5, "No data available.", color='white', ha='center', va='center',
+                         transform=self.ax.transAxes)
+            return False
+
+        if layout == self.layout and graphType in ("bar", "line"):
+            instrument.count("visualizer.canvas.in_place_updates")
+            self.update(result)
+            return True
+
+        self.reset()
+        with instrument.span("visualizer.axes"):
+            artists = draw_axes(self.ax, result)
+        if artists is None:
+            return False
+        self.artists = artists
+        self.layout = layout
+        return True
+
+    def update(self, result):
+        values = result["plotData"]["values"]
+        self.background = None
+        if "bars" in self.artists:
+            for bar, value in zip(self.artists["bars"], values):
+                bar.set_height(value)
+        if "steps" in self.artists:
+            self.artists["steps"].set_data(values)
+        if "line" in self.artists:
+            x, y = self.artists["x"], np.asarray(values, dtype=np.float64)
+            large = len(x) > LARGE_SERIES_POINTS
+            xs, ys = downsample(x, y) if large else (x, y)
+            self.artists["line"].set_data(xs, ys)
+            self.artists["fill"].remove()
+            self.artists["fill"] = self.ax.fill_between(xs, ys, color='#00ffcc', alpha=0.1, rasterized=large)
+            self.artists["y"] = y
+        if "stats" in self.artists:
+            self.artists["stats"].set_text(format_stats(result))
+
+        self.ax.title.set_text(result["title"])
+        self.ax.relim()
+        self.ax.autoscale_view()
+
+    def reset(self):
+        self.ax.clear()
+        self.ax.set_axis_on()
+        self.ax.set_aspect('auto')
+        self.artists = {}
+        self.layout = None
+        self.background = None
+        self.range_artists = None
+
+    # --- Blitted Range Highlight ---
+
+    def capture_background(self, canvas):
+        """Caches the fully drawn chart; hook to the canvas "draw_event" so resizes refresh it."""
+        self.background = canvas.copy_from_bbox(self.figure.bbox)
+
+    def highlight_range(self, canvas, start, end):
+        """
+        Highlights the x range [start, end] of a line chart by restoring the
+        cached background and drawing only a span and the (downsampled)
+        segment, so each frame costs the same however long the series is.
+        Returns False when the current chart is not a line chart.
+        """
+        if "line" not in self.artists:
+            return False
+        if self.background is None:
+            canvas.draw()
+            self.capture_background(canvas)
+
+        if self.range_artists is None:
+            from matplotlib.patches import Rectangle
+            span = Rectangle((0, 0), 0, 1, transform=self.ax.get_xaxis_transform(),
+                             color='#00ffcc', alpha=0.12, animated=True)
+            self.ax.add_patch(span)
+            segment, = self.ax.plot([], [], color='#ffffff', linewidth=2.5, animated=True)
+            self.range_artists = (span, segment)
+
+        lo, hi = sorted((start, end))
+        x, y = self.artists["x"], self.artists["y"]
+        first, last = np.searchsorted(x, lo, side="left"), np.searchsorted(x, hi, side="right")
+        span, segment = self.range_artists
+        span.set_x(lo)
+        span.set_width(hi - lo)
+        segment.set_data(*downsample(x[first:last], y[first:last]))
+
+        canvas.restore_region(self.background)
+        self.ax.draw_artist(span)
+        self.ax.draw_artist(segment)
+        canvas.blit(self.figure.bbox)
+        return True
+
+    def clear_range(self, canvas):
+        if self.range_artists is not None and self.background is not None:
+            canvas.restore_region(self.background)
+            canvas.blit(self.figure.bbox)
+
+    def close(self):
+        """Releases every artist held by the figure."""
+        self.reset()
+        self.figure.clear()
@@ -0,0 +1,169 @@
+import os
+import threading
+
+import numpy as np
+
+import loader
+
+# Derived structures a structural patch takes over from the freshly loaded dataset.
+DERIVED_PROPERTIES = ("aggregate", "index", "ranges", "rollup")
+
+# --- Diffing ---
+
+def diffDatasets(old, new):
+    """
+    Compares two loads of the same file by Country Code. Returns None when the
+    year columns differ (nothing can be patched), otherwise a dict with
+      changed  - (oldRows, newRows) whose values or missing cells differ
+      relabelled - (oldRows, newRows) whose country name or region changed
+      added / removed - rows only in new / only in old
+    """
+    if not np.array_equal(old.years, new.years):
+        return None
+
+    oldRows, newRows, removed = [], [], []
+    for row, code in enumerate(old.codes):
+        match = new.index.findCode(code)
+        if match is None:
+            removed.append(row)
+        else:
+            oldRows.append(row)
+            newRows.append(match)
+    oldRows = np.array(oldRows, dtype=np.int64)
+    newRows = np.array(newRows, dtype=np.int64)
+    matched = np.zeros(len(new), dtype=bool)
+    matched[newRows] = True
+
+    oldMask, newMask = old.mask[oldRows], new.mask[newRows]
+    differs = (oldMask != newMask) | (oldMask & (old.values[oldRows] != new.values[newRows]))
+    changed = differs.any(axis=1)
+    relabelled = (old.countries[oldRows] != new.countries[newRows]) | (old.regions[oldRows] != new.regions[newRows])
+
+    return {
+            "changed": (oldRows[changed & ~relabelled], newRows[changed & ~relabelled]),
+            "relabelled": (oldRows[relabelled], newRows[relabelled]),
+            "added": np.flatnonzero(~matched),
+            "removed": np.array(removed, dtype=np.int64)
+            }
+
+def isStructural(diff):
+    return diff is None or bool(len(diff["relabelled"][0]) or len(diff["added"]) or len(diff["removed"]))
+
+# --- Patching ---
+
+def writable(array):
+    """Snapshot-backed arrays are read-only memory maps; the first patch takes a private copy."""
+    return array if array.flags.writeable else np.array(array)
+
+def applyPatch(dataset, new, diff):
+    """
+    Brings dataset in line with new, in place, and bumps its version. Value-only
+    changes overwrite just those rows and patch the range index and the rollup
+    of the affected regions; added, removed or relabelled entities (or new year
+    columns) take over new's arrays and derived indexes wholesale.
+    Returns {"codes": affected codes, "regions": affected regions, "structural": bool}.
+    """
+    if diff is None:
+        codes = set(dataset.codes.tolist()) | set(new.codes.tolist())
+        regions = set(dataset.regions.tolist()) | set(new.regions.tolist())
+    else:
+        codes, regions = set(), set()
+        for oldRows, newRows in (diff["changed"], diff["relabelled"]):
+            codes.update(dataset.codes[oldRows].tolist())
+            regions.update(dataset.regions[oldRows].tolist())
+            regions.update(new.regions[newRows].tolist())
+        codes.update(new.codes[diff["added"]].tolist())
+        regions.update(new.regions[diff["added"]].tolist())
+        codes.update(dataset.codes[diff["removed"]].tolist())
+        regions.update(dataset.regions[diff["removed"]].tolist())
+
+    structural = isStructural(diff)
+    if structural:
+        for name in ("years", "values", "mask", "countries", "codes", "regions"):
+            setattr(dataset, name, getattr(new, name))
+        for name in DERIVED_PROPERTIES:
+            dataset.__dict__.pop(name, None)
+            if name in new.__dict__:
+                dataset.__dict__[name] = new.__dict__[name]
+    else:
+        oldRows, newRows = diff["changed"]
+        if len(oldRows):
+            dataset.values = writable(dataset.values)
+            dataset.mask = writable(dataset.mask)
+            dataset.values[oldRows] = new.values[newRows]
+            dataset.mask[oldRows] = new.mask[newRows]
+            if "ranges" in dataset.__dict__:
+                dataset.ranges.updateRows(dataset, oldRows)
+            if "rollup" in dataset.__dict__:
+                dataset.rollup.updateRegions(dataset, regions)
+
+    if codes:
+        dataset.touch()
+    return {"codes": codes, "regions": regions, "structural": structural}
+
+def reloadChanges(dataset, path=None):
+    """
+    Re-reads the dataset's source (refreshing its snapshot) and diffs it against
+    the loaded copy. Returns (new, diff) for applyPatch; safe to run off the
+    thread that owns dataset since it only reads it.
+    """
+    new = loader.loadDataset(path or dataset.source)
+    if len(new) == 0 and len(dataset):
+        raise ValueError("the updated file has no rows; keeping the loaded data")
+    return new, diffDatasets(dataset, new)
+
+# --- Polling Watcher ---
+
+class FileWatcher:
+    """
+    Polls a file's size and mtime on a daemon thread and calls onChange(path)
+    once a change has settled (the signature is unchanged for one more poll),
+    so a file that is still being written is not read half-way.
+    """
+
+    def __init__(self, path, onChange, interval=2.0):
+        self.path = path
+        self.onChange = onChange
+        self.interval = interval
+        self.signature = self.stat()
+        self._pending = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_size, st.st_mtime_ns)
+
+    def poll(self):
+        """One check; returns True when onChange fired."""
+        current = self.stat()
+        if current is None or current == self.signature:
+            self._pending = None
+            return False
+        if current != self._pending:
+            self._pending = current
+            return False
+
+        self.signature = current
+        self._pending = None
+        self.onChange(self.path)
+        return True
+
+    def run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Warning: reload of '{self.path}' failed: {e}")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name="file-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()